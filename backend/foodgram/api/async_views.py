@@ -0,0 +1,92 @@
+from functools import partial, wraps
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import FileResponse
+from django.urls import URLPattern
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+READ_ROUTES = {
+    "recipes-list",
+    "recipes-detail",
+    "recipes-download-shopping-cart",
+    "tags-list",
+    "tags-detail",
+    "ingredients-list",
+    "ingredients-detail",
+}
+# Потоковый ответ до этого размера держится в памяти, больший
+# сбрасывается во временный файл.
+SPOOL_MAX_SIZE = 2 * 2 ** 20
+
+
+def spool_streaming(response):
+    """Записывает потоковый ответ во временный файл и отдаёт файл.
+
+    В Django 3.2 ASGI-обработчик перебирает итератор ответа в цикле
+    событий, где обращения к базе запрещены, а асинхронные итераторы
+    не поддерживаются. Поэтому строки из базы читаются здесь, в потоке
+    пула, а клиенту файл по-прежнему отдаётся порциями, и память
+    процесса не растёт вместе с размером выгрузки.
+    """
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for chunk in response.streaming_content:
+        spool.write(chunk)
+    size = spool.tell()
+    spool.seek(0)
+    spooled = FileResponse(spool, status=response.status_code)
+    for header, value in response.items():
+        spooled[header] = value
+    spooled["Content-Length"] = size
+    return spooled
+
+
+def run_read_view(view, request, *args, **kwargs):
+    """Выполняет синхронный view в потоке пула и там же рендерит ответ.
+
+    Потоковый ответ перед отправкой записывается во временный файл
+    (spool_streaming).
+    """
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, "render", None)):
+            response = response.render()
+        if response.streaming:
+            response = spool_streaming(response)
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обёртка над view DRF для ASGI-режима.
+
+    Чтения выполняются в общем пуле потоков (thread_sensitive=False)
+    и не ждут друг друга, а запросы на запись идут в единый поток
+    синхронного кода, как у обычных синхронных view.
+    """
+    read = sync_to_async(partial(run_read_view, view), thread_sensitive=False)
+    write = sync_to_async(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def async_read_urls(urlpatterns, routes=READ_ROUTES):
+    """Заменяет view маршрутов routes на асинхронные обёртки."""
+    return [
+        URLPattern(
+            pattern.pattern, async_read_view(pattern.callback),
+            pattern.default_args, pattern.name,
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in routes
+        else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,61 @@
+import pickle
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import LocalLRUCache
+
+TOKEN_CACHE_KEY = "auth-token:{}"
+
+local_tokens = LocalLRUCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    timeout=settings.TOKEN_CACHE_LOCAL_TIMEOUT,
+)
+
+
+def token_cache_key(key):
+    return TOKEN_CACHE_KEY.format(sha256(key.encode()).hexdigest())
+
+
+def invalidate_tokens(keys):
+    """Удаляет токены из кэшей после фиксации транзакции.
+
+    Локальные кэши других процессов забывают токен не позже чем через
+    TOKEN_CACHE_LOCAL_TIMEOUT секунд.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+
+    def invalidate():
+        for key in keys:
+            local_tokens.delete(key)
+        cache.delete_many([token_cache_key(key) for key in keys])
+
+    transaction.on_commit(invalidate)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену без запросов к базе на горячем пути.
+
+    Токен вместе с пользователем ищется сначала в LRU-кэше процесса,
+    затем в общем кэше и только потом в базе. В кэшах хранится
+    сериализованный токен, поэтому каждый запрос получает свой
+    экземпляр пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        data = local_tokens.get(key)
+        if data is None:
+            data = cache.get(token_cache_key(key))
+            if data is None:
+                _, token = super().authenticate_credentials(key)
+                data = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+                cache.set(token_cache_key(key), data,
+                          settings.TOKEN_CACHE_TIMEOUT)
+            local_tokens.set(key, data)
+        token = pickle.loads(data)
+        return token.user, token
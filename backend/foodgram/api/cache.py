@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Ingredient, Tag
+
+RECIPE_CACHE_TIMEOUT = 60 * 60
+RECIPE_VERSION_KEY = "recipe-version:{}"
+REFERENCE_VERSION_KEY = "reference-version:{}"
+RECIPE_DETAIL_KEY = "recipe-detail:{}:{}:{}:{}:{}"
+USER_FLAGS = ("is_favorited", "is_in_shopping_cart")
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU-кэш в памяти процесса с необязательным TTL."""
+
+    def __init__(self, maxsize, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = (
+            None if self.timeout is None
+            else time.monotonic() + self.timeout
+        )
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+def new_version():
+    """Версия, не совпадающая с ранее выданными, даже если старая
+    версия была вытеснена из кэша или истекла."""
+    return time.time_ns()
+
+
+def get_versions(*keys):
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, settings.CACHE_VERSION_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_recipe_versions(recipe_ids):
+    cache.set_many(
+        {RECIPE_VERSION_KEY.format(pk): new_version() for pk in recipe_ids},
+        settings.CACHE_VERSION_TIMEOUT,
+    )
+
+
+def reference_version_key(model):
+    return REFERENCE_VERSION_KEY.format(model._meta.label_lower)
+
+
+def get_reference_version(model):
+    """Версия справочника (тэгов или ингредиентов), меняется при записи."""
+    return get_versions(reference_version_key(model))[0]
+
+
+def bump_reference_version(model):
+    cache.set(reference_version_key(model), new_version(),
+              settings.CACHE_VERSION_TIMEOUT)
+
+
+def recipe_detail_key(request, pk):
+    """Ключ общей для всех пользователей части карточки рецепта."""
+    versions = get_versions(
+        RECIPE_VERSION_KEY.format(pk),
+        reference_version_key(Tag),
+        reference_version_key(Ingredient),
+    )
+    return RECIPE_DETAIL_KEY.format(
+        pk, *versions, request.build_absolute_uri("/"))
+
+
+def split_user_flags(data):
+    """Обнуляет в представлении рецепта признаки текущего пользователя,
+    сохраняя порядок полей."""
+    shared = {**data, **dict.fromkeys(USER_FLAGS)}
+    shared["author"] = {**data["author"], "is_subscribed": None}
+    return shared
+
+
+def merge_user_flags(shared, is_favorited, is_in_shopping_cart,
+                     is_subscribed):
+    data = {**shared, "is_favorited": is_favorited,
+            "is_in_shopping_cart": is_in_shopping_cart}
+    data["author"] = {**shared["author"], "is_subscribed": is_subscribed}
+    return data
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Кэши, не общие для процессов: в них не видна отметка о записи или
+# версия данных, изменённая другим процессом.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+SHARED_CACHE_HINT = (
+    "Укажите общий кэш, например CACHE_BACKEND=django.core.cache."
+    "backends.memcached.PyMemcacheCache."
+)
+
+
+def cache_is_shared():
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, Tags.database)
+def check_shared_cache(app_configs, **kwargs):
+    """Чтение своих записей при репликах и версии кэша рецептов
+    и справочников держатся на кэше, поэтому вне режима отладки он
+    должен быть общим для всех процессов."""
+    if cache_is_shared():
+        return []
+    if settings.DATABASE_REPLICAS:
+        return [Warning(
+            "Реплики для чтения настроены, а кэш не общий для процессов.",
+            hint="После записи клиент может прочитать устаревшие данные "
+                 "из реплики через другой процесс. " + SHARED_CACHE_HINT,
+            id="api.W001",
+        )]
+    if settings.DEBUG:
+        return []
+    return [Warning(
+        "Кэш не общий для процессов.",
+        hint="Записи другого воркера или manage.py load_ingr станут видны "
+             "в кэше рецептов и справочников только через "
+             f"CACHE_VERSION_TIMEOUT={settings.CACHE_VERSION_TIMEOUT} "
+             "секунд. " + SHARED_CACHE_HINT,
+        id="api.W001",
+    )]
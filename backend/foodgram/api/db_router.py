@@ -0,0 +1,117 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REPLICA_PATHS = ("/api/",)
+# Вход и выход читают учётные данные, которые могли только что измениться.
+PRIMARY_PATHS = ("/api/auth/",)
+# Токен проверяется в каждом запросе, а только что выданный токен
+# может ещё не дойти до реплики.
+PRIMARY_MODELS = {"authtoken.token"}
+STICKY_KEY = "db-primary:{}"
+
+
+class RoutingState:
+    """База для чтений текущего запроса и признак записи в нём."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.wrote = False
+
+
+routing_state = ContextVar("routing_state", default=None)
+
+
+def sticky_key(request):
+    """Ключ клиента в кэше по токену или сессии, None для анонима."""
+    credentials = request.META.get("HTTP_AUTHORIZATION") or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    return STICKY_KEY.format(sha256(credentials.encode()).hexdigest())
+
+
+def choose_alias(request, key):
+    if (
+        request.method in SAFE_METHODS
+        and request.path.startswith(REPLICA_PATHS)
+        and not request.path.startswith(PRIMARY_PATHS)
+        and not (key and cache.get(key))
+    ):
+        return random.choice(settings.DATABASE_REPLICAS)
+    return PRIMARY
+
+
+@contextmanager
+def use_primary():
+    """Чтения внутри блока идут в основную базу.
+
+    Нужен при заполнении версионированных кэшей: версия уже сменилась,
+    а реплика может ещё не получить запись, которая её сменила.
+    """
+    state = routing_state.get()
+    if state is None:
+        yield
+        return
+    alias, state.alias = state.alias, PRIMARY
+    try:
+        yield
+    finally:
+        if not state.wrote:
+            state.alias = alias
+
+
+class ReplicaRoutingMiddleware:
+    """Выбирает базу для чтений запроса.
+
+    Безопасные запросы к API читают из случайной реплики из
+    DATABASE_REPLICAS, остальные — из основной базы. После записи
+    клиент ещё DATABASE_PRIMARY_STICKY_SECONDS секунд читает из
+    основной базы, чтобы не увидеть устаревшие данные реплики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = sticky_key(request)
+        state = RoutingState(choose_alias(request, key))
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if key and (state.wrote or request.method not in SAFE_METHODS):
+            cache.set(key, True, settings.DATABASE_PRIMARY_STICKY_SECONDS)
+        return response
+
+
+class PrimaryReplicaRouter:
+    """Записи всегда идут в основную базу, чтения внутри запроса —
+    в базу, выбранную ReplicaRoutingMiddleware."""
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None:
+            return None
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return PRIMARY
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.alias = PRIMARY
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
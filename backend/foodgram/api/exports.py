@@ -0,0 +1,121 @@
+import csv
+import logging
+from io import BytesIO
+
+from django.conf import settings
+
+from recipes.models import ShoppingListTotal
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFError, TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+logger = logging.getLogger(__name__)
+
+SHOPPING_LIST_TITLE = "Список покупок"
+CHUNK_SIZE = 2000
+PDF_FONT_NAME = "ShoppingListFont"
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+
+# Зарегистрированные шрифты PDF: путь к файлу — имя шрифта или None,
+# если файл не удалось прочитать.
+pdf_fonts = {}
+
+
+def shopping_list_rows(user):
+    """Суммы ингредиентов по всем рецептам из списка покупок.
+
+    Суммы поддерживаются в ShoppingListTotal при изменении списка
+    и рецептов, поэтому выгрузка — чтение по индексу пользователя.
+    Строки читаются порциями по CHUNK_SIZE.
+    """
+    return ShoppingListTotal.objects.filter(
+        user=user, amount__gt=0
+    ).order_by(
+        "ingredient__name", "ingredient__measurement_unit"
+    ).values_list(
+        "ingredient__name", "ingredient__measurement_unit", "amount"
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(rows):
+    yield f"{SHOPPING_LIST_TITLE}\n\n"
+    for name, unit, amount in rows:
+        yield f"{name} - {amount} {unit}\n"
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(("Ингредиент", "Количество", "Единица измерения"))
+    for name, unit, amount in rows:
+        yield writer.writerow((name, amount, unit))
+
+
+def pdf_font():
+    """Имя шрифта с кириллицей из SHOPPING_LIST_PDF_FONT или None.
+
+    Встроенные шрифты reportlab кириллицу не выводят, поэтому без
+    файла шрифта выгрузка в PDF не предлагается.
+    """
+    path = settings.SHOPPING_LIST_PDF_FONT
+    if path not in pdf_fonts:
+        name = f"{PDF_FONT_NAME}{len(pdf_fonts)}"
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+        except (OSError, TTFError):
+            logger.warning("Не удалось загрузить шрифт PDF %s", path)
+            name = None
+        pdf_fonts[path] = name
+    return pdf_fonts[path]
+
+
+def export_pdf(rows):
+    """PDF строится постранично по мере чтения строк и отдаётся целиком:
+    reportlab записывает документ только при сохранении."""
+    font = pdf_font()
+    buffer = BytesIO()
+    document = canvas.Canvas(buffer, pagesize=A4)
+    _, height = A4
+
+    def new_page(title=None):
+        document.setFont(font, PDF_FONT_SIZE)
+        if title is None:
+            return height - PDF_MARGIN
+        document.drawString(PDF_MARGIN, height - PDF_MARGIN, title)
+        return height - PDF_MARGIN - 2 * PDF_LINE_HEIGHT
+
+    y = new_page(SHOPPING_LIST_TITLE)
+    for name, unit, amount in rows:
+        if y < PDF_MARGIN:
+            document.showPage()
+            y = new_page()
+        document.drawString(PDF_MARGIN, y, f"{name} - {amount} {unit}")
+        y -= PDF_LINE_HEIGHT
+    document.save()
+    yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "txt": (export_txt, "text/plain; charset=utf-8"),
+    "csv": (export_csv, "text/csv; charset=utf-8"),
+    "pdf": (export_pdf, "application/pdf"),
+}
+
+
+def available_formats():
+    if canvas is None or pdf_font() is None:
+        return [name for name in EXPORT_FORMATS if name != "pdf"]
+    return list(EXPORT_FORMATS)
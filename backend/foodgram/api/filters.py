@@ -1,7 +1,9 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Favorite, Recipe, ShoppingList, Tag, User
+from recipes.models import Favorite, Recipe, ShoppingList, User
 
 CHOICES = (
     ("0", "False"),
@@ -9,6 +11,18 @@ CHOICES = (
 )
 
 
+class SlugListField(forms.Field):
+    """Список slug из повторяющегося параметра запроса."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        return [slug for slug in value or () if slug]
+
+
+class SlugListFilter(filters.Filter):
+    field_class = SlugListField
+
+
 class RecipeFilter(FilterSet):
     """Фильтр для рецептов."""
     is_favorited = filters.ChoiceFilter(
@@ -22,13 +36,11 @@ class RecipeFilter(FilterSet):
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all()
     )
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name="tags__slug",
-        to_field_name="slug",
-        queryset=Tag.objects.all()
-    )
+    tags = SlugListFilter(method="get_tags")
 
     def get_is_flagged(self, queryset, name, value):
+        """Коррелированный EXISTS по избранному или списку покупок:
+        рецепты не размножаются, а список id не грузится в память."""
         user = self.request.user
         if user.is_anonymous:
             return Recipe.objects.none()
@@ -38,12 +50,19 @@ class RecipeFilter(FilterSet):
         elif name == "is_in_shopping_cart":
             flag_model = ShoppingList
 
-        flagged_items = flag_model.objects.filter(user=user)
-        recipes_id = [item.recipe.id for item in flagged_items]
-
+        flagged = Exists(flag_model.objects.filter(
+            user=user, recipe=OuterRef("pk")))
         if value == "1":
-            return queryset.filter(id__in=recipes_id)
-        return queryset.exclude(id__in=recipes_id)
+            return queryset.filter(flagged)
+        return queryset.filter(~flagged)
+
+    def get_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тэгов. EXISTS вместо JOIN
+        не даёт дубликатов и не требует DISTINCT."""
+        if not value:
+            return queryset
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef("pk"), tag__slug__in=value)))
 
     class Meta:
         model = Recipe
@@ -0,0 +1,148 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from .cache import bump_recipe_versions
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = "variants"
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+executor = None
+executor_lock = Lock()
+
+
+def get_storage():
+    """Хранилище оригиналов картинок рецептов."""
+    return Recipe._meta.get_field("image").storage
+
+
+def variants_dir(name):
+    """Каталог копий: recipes/abc.png -> recipes/variants/abc."""
+    directory, filename = posixpath.split(name)
+    return posixpath.join(
+        directory, VARIANTS_DIR, posixpath.splitext(filename)[0])
+
+
+def variant_name(name, label, extension):
+    return posixpath.join(variants_dir(name), f"{label}.{extension}")
+
+
+def save_variant(storage, image, name, image_format, **options):
+    if storage.exists(name):
+        return name
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(recipe_id, name):
+    """Уменьшенные копии картинки рецепта в исходном формате и в WebP.
+
+    Размеры задаются в RECIPE_IMAGE_VARIANTS как длина большей стороны,
+    картинки меньше этого размера не увеличиваются. Пути копий
+    сохраняются в Recipe.image_variants, если картинка рецепта за это
+    время не сменилась.
+    """
+    with get_storage().open(name) as file:
+        image = Image.open(file)
+        image.load()
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+    if image_format == "JPEG":
+        extension, options = "jpg", {"quality": JPEG_QUALITY}
+        image = image.convert("RGB")
+    else:
+        image_format, extension, options = "PNG", "png", {"optimize": True}
+
+    variants = {}
+    for label, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[label] = {
+            extension: save_variant(
+                default_storage, resized, variant_name(name, label, extension),
+                image_format, **options),
+            "webp": save_variant(
+                default_storage, resized, variant_name(name, label, "webp"),
+                "WEBP", quality=WEBP_QUALITY),
+        }
+    if Recipe.objects.filter(id=recipe_id, image=name).update(
+            image_variants=variants):
+        bump_recipe_versions([recipe_id])
+    return variants
+
+
+def run_build_variants(recipe_id, name, in_pool=True):
+    try:
+        build_variants(recipe_id, name)
+    except Exception:
+        logger.exception(
+            "Не удалось построить копии картинки %s рецепта %s",
+            name, recipe_id)
+    finally:
+        if in_pool:
+            connections.close_all()
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.RECIPE_IMAGE_WORKERS,
+                    thread_name_prefix="recipe-images",
+                )
+    return executor
+
+
+def schedule_variants(recipe):
+    """Ставит построение копий картинки в пул после фиксации транзакции.
+
+    При RECIPE_IMAGE_WORKERS = 0 копии строятся сразу, в текущем потоке.
+    """
+    recipe_id, name = recipe.id, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS > 0:
+            get_executor().submit(run_build_variants, recipe_id, name)
+        else:
+            run_build_variants(recipe_id, name, in_pool=False)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(recipe, request=None):
+    """{"small": {"webp": url, "png": url}, ...} для готовых копий."""
+    build = request.build_absolute_uri if request else str
+    return {
+        label: {
+            extension: build(default_storage.url(name))
+            for extension, name in files.items()
+        }
+        for label, files in recipe.image_variants.items()
+    }
+
+
+def delete_image(name):
+    """Удаляет картинку и её копии."""
+    get_storage().delete(name)
+    directory = variants_dir(name)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        default_storage.delete(posixpath.join(directory, filename))
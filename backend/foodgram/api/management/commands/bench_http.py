@@ -0,0 +1,79 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+import requests
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = (
+    "/api/recipes/",
+    "/api/tags/",
+    "/api/ingredients/?name=а",
+)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный сервер запросами на чтение и выводит "
+        "пропускную способность и задержки p50/p99 для нескольких уровней "
+        "параллельности. Запускается по очереди против gunicorn в режиме "
+        "WSGI и ASGI (SERVER_MODE) на одних и тех же данных."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--path", action="append", dest="paths")
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--token", help="Токен для авторизованных чтений.")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        self.timeout = options["timeout"]
+        self.headers = (
+            {"Authorization": f"Token {options['token']}"}
+            if options["token"] else {}
+        )
+        self.local = threading.local()
+        urls = [
+            options["url"].rstrip("/") + path
+            for path in options["paths"] or DEFAULT_PATHS
+        ]
+        for concurrency in options["concurrency"]:
+            self.run(urls, concurrency, options["requests"])
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+            self.local.session.headers.update(self.headers)
+        return self.local.session
+
+    def fetch(self, url):
+        started = time.perf_counter()
+        try:
+            ok = self.session().get(url, timeout=self.timeout).ok
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def run(self, urls, concurrency, total):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                self.fetch, islice(cycle(urls), total)))
+        elapsed = time.perf_counter() - started
+        latencies = [latency * 1000 for latency, _ in results]
+        errors = sum(not ok for _, ok in results)
+        self.stdout.write(
+            f"Параллельно {concurrency}: {total / elapsed:.1f} запр/с, "
+            f"p50 {statistics.median(latencies):.1f} мс, "
+            f"p99 {percentile(latencies, 0.99):.1f} мс, "
+            f"ошибок {errors}")
@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.search import ingredient_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск ингредиентов по префиксу через индекс в памяти "
+        "и через ORM (istartswith)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list("name", flat=True))
+        if not names:
+            self.stdout.write("Ингредиенты не загружены.")
+            return
+        rng = random.Random(options["seed"])
+        prefixes = [
+            name[:rng.randint(1, min(4, len(name)))]
+            for name in rng.choices(names, k=options["queries"])
+        ]
+
+        started = time.perf_counter()
+        ingredient_index.warm_up()
+        build = time.perf_counter() - started
+        self.stdout.write(f"Построение индекса: {build * 1000:.1f} мс")
+
+        for title, search in (
+            ("Индекс", ingredient_index.search),
+            ("ORM", lambda prefix: list(Ingredient.objects.filter(
+                name__istartswith=prefix).values(
+                    "id", "name", "measurement_unit"))),
+        ):
+            started = time.perf_counter()
+            for prefix in prefixes:
+                search(prefix)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{title}: {elapsed / len(prefixes) * 1000:.3f} мс "
+                f"на запрос ({len(prefixes)} запросов)")
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Exists, OuterRef
+
+from recipes.models import Favorite, Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает прежний фильтр is_favorited (список id в памяти) и "
+        "коррелированный EXISTS для пользователей с самым большим избранным, "
+        "а также фильтр по тэгам через JOIN с DISTINCT и через EXISTS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=6)
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        self.page_size = options["page_size"]
+        recipes = Recipe.objects.order_by("-pub_date", "-id")
+        users = User.objects.annotate(
+            favorites_count=Count("favorites")
+        ).filter(favorites_count__gt=0).order_by(
+            "-favorites_count")[:options["users"]]
+        if not users:
+            self.stdout.write("Избранное пусто, выполните seed_foodgram.")
+            return
+
+        for user in users:
+            self.stdout.write(
+                f"{user.username}: {user.favorites_count} в избранном")
+            self.measure("  Прежний фильтр", lambda: recipes.filter(id__in=[
+                item.recipe.id for item in Favorite.objects.filter(user=user)
+            ]))
+            self.measure("  EXISTS", lambda: recipes.filter(Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk")))))
+
+        slugs = list(Tag.objects.values_list("slug", flat=True))
+        self.stdout.write(f"Тэги: {', '.join(slugs)}")
+        self.measure("  JOIN + DISTINCT", lambda: recipes.filter(
+            tags__slug__in=slugs).distinct())
+        self.measure("  EXISTS", lambda: recipes.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef("pk"), tag__slug__in=slugs))))
+
+    def measure(self, title, build):
+        """Время первой страницы и подсчёта, как в списке рецептов."""
+        started = time.perf_counter()
+        for _ in range(self.repeat):
+            queryset = build()
+            queryset.count()
+            list(queryset[:self.page_size])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{title}: {elapsed / self.repeat * 1000:.2f} мс на запрос")
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит уменьшенные копии и WebP для картинок рецептов, у которых "
+        "их ещё нет (или для всех с --all)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image="").order_by("id")
+        if not options["all"]:
+            recipes = recipes.filter(image_variants={})
+        started = time.perf_counter()
+        built = failed = 0
+        for recipe_id, name in recipes.values_list("id", "image").iterator(
+                chunk_size=options["chunk_size"]):
+            try:
+                build_variants(recipe_id, name)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f"Рецепт {recipe_id}, {name}: {error}")
+                continue
+            built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Копии построены для рецептов: {built}, ошибок: {failed}, "
+            f"за {time.perf_counter() - started:.1f} c."))
@@ -0,0 +1,104 @@
+import posixpath
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import bump_recipe_versions
+from api.images import delete_image, get_storage
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Переименовывает картинки рецептов по хэшу содержимого, сводя "
+        "одинаковые файлы в один, и удаляет файлы без ссылок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Только показать, что будет сделано.")
+        parser.add_argument(
+            "--delete-orphans", action="store_true",
+            help="Удалить файлы каталога картинок, на которые не "
+                 "ссылается ни один рецепт, вместе с их копиями.")
+        parser.add_argument(
+            "--orphan-age", type=int,
+            default=settings.RECIPE_IMAGE_ORPHAN_AGE,
+            help="Считать файл без ссылок лишним, только если он не "
+                 "сохранялся столько секунд.")
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        dry_run = options["dry_run"]
+        started = time.perf_counter()
+        renamed = merged = missing = freed = 0
+        targets = set()
+        names = Recipe.objects.exclude(image="").order_by(
+            "image").values_list("image", flat=True).distinct()
+        for name in list(names):
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Файл не найден: {name}")
+                continue
+            with storage.open(name) as file:
+                target = storage.hashed_name(name, File(file))
+            if target == name:
+                continue
+            renamed += 1
+            if target in targets or storage.exists(target):
+                merged += 1
+                freed += storage.size(name)
+            targets.add(target)
+            if dry_run:
+                continue
+            with storage.open(name) as file:
+                target = storage.save(name, File(file))
+            recipes = Recipe.objects.filter(image=name)
+            recipe_ids = list(recipes.values_list("id", flat=True))
+            with transaction.atomic():
+                recipes.update(image=target, image_variants={})
+            bump_recipe_versions(recipe_ids)
+            # Прежнее имя не хэш содержимого: хранилище такое имя не
+            # выдаст, и новых ссылок на файл не появится.
+            if not Recipe.objects.filter(image=name).exists():
+                delete_image(name)
+
+        orphans = self.find_orphans(storage, options["orphan_age"])
+        if options["delete_orphans"] and not dry_run:
+            for name in orphans:
+                freed += storage.size(name)
+                delete_image(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Переименовано: {renamed}, из них совпали с существующими: "
+            f"{merged}, не найдено: {missing}, файлов без ссылок: "
+            f"{len(orphans)}, освобождено байт: {freed}, "
+            f"за {time.perf_counter() - started:.1f} c."))
+        if renamed and not dry_run:
+            self.stdout.write(
+                "Постройте копии картинок: "
+                "python manage.py build_image_variants")
+
+    def find_orphans(self, storage, age):
+        """Файлы без ссылок, не сохранявшиеся age секунд. Свежий файл
+        мог только что сохранить запрос, ещё не записавший рецепт."""
+        saved_before = timezone.now() - timedelta(seconds=age)
+        directory = Recipe._meta.get_field("image").upload_to.rstrip("/")
+        try:
+            _, files = storage.listdir(directory)
+        except FileNotFoundError:
+            return []
+        referenced = set(
+            Recipe.objects.values_list("image", flat=True).distinct())
+        names = (posixpath.join(directory, filename) for filename in files)
+        return [
+            name for name in names
+            if name not in referenced
+            and storage.get_modified_time(name) < saved_before
+        ]
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.ndjson import BATCH_SIZE, export_lines
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в NDJSON в формате import_recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-",
+            help="Файл NDJSON или «-» для вывода в stdout.")
+        parser.add_argument("--author", help="Только рецепты автора.")
+        parser.add_argument("--chunk-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if options["author"]:
+            recipes = recipes.filter(author__username=options["author"])
+        lines = export_lines(recipes, options["chunk_size"])
+        if options["path"] == "-":
+            sys.stdout.writelines(lines)
+            return
+        with open(options["path"], "w", encoding="utf-8") as file:
+            file.writelines(lines)
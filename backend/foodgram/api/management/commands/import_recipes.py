@@ -0,0 +1,40 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ndjson import BATCH_SIZE, RecipeImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует рецепты из NDJSON: по одному рецепту в строке, "
+        "тэги — slug, ингредиенты — название и единица измерения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Файл NDJSON или «-» для чтения из stdin.")
+        parser.add_argument(
+            "--author",
+            help="Имя пользователя для строк без поля author.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        importer = RecipeImporter(
+            author=options["author"], batch_size=options["batch_size"])
+        started = time.perf_counter()
+        if options["path"] == "-":
+            importer.run(sys.stdin)
+        else:
+            with open(options["path"], encoding="utf-8") as file:
+                importer.run(file)
+        for number, error in importer.errors:
+            if not isinstance(error, str):
+                error = json.dumps(error, ensure_ascii=False)
+            self.stderr.write(f"Строка {number}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Импортировано рецептов: {importer.created}, "
+            f"строк с ошибками: {len(importer.errors)}, "
+            f"за {time.perf_counter() - started:.1f} c."))
@@ -1,10 +1,62 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+
+from .cache import LocalLRUCache, get_reference_version
+from .db_router import use_primary
+
+rendered_responses = LocalLRUCache(maxsize=512)
 
 
 class SimpleViewSet(mixins.ListModelMixin,
                     mixins.RetrieveModelMixin,
                     viewsets.GenericViewSet):
+    """Вьюсет справочника с условными GET-запросами.
 
+    ETag и Last-Modified строятся по версии справочника, которая
+    меняется при записи в модель. Готовый JSON хранится в памяти
+    процесса, поэтому повторные запросы не обращаются к базе, а клиент
+    с актуальным ETag получает 304.
+    """
     permission_classes = (AllowAny,)
     pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def versioned_response(self, handler, request, *args, **kwargs):
+        model = self.queryset.model
+        version = get_reference_version(model)
+        renderer_format = request.accepted_renderer.format
+        etag = quote_etag(
+            f"{model._meta.label_lower}-{version}-{renderer_format}")
+        last_modified = version // 10 ** 9
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if renderer_format == JSONRenderer.format:
+            key = (request.get_full_path(), version)
+            content = rendered_responses.get(key)
+            if content is None:
+                with use_primary():
+                    content = JSONRenderer().render(
+                        handler(request, *args, **kwargs).data)
+                rendered_responses.set(key, content)
+            response = HttpResponse(
+                content, content_type=JSONRenderer.media_type)
+        else:
+            with use_primary():
+                response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
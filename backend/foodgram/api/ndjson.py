@@ -0,0 +1,222 @@
+import itertools
+import json
+from collections import Counter
+
+from django.db import connections, transaction
+from rest_framework import serializers
+
+from recipes import counters
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+from .images import schedule_variants
+from .serializers import MAX_COUNT, MIN_COUNT, RecipeImageField
+
+BATCH_SIZE = 500
+
+
+class ImportImageField(RecipeImageField):
+    """Картинка в base64 (data:image/...) или путь к уже загруженному
+    файлу в хранилище, как его выгружает export_recipes."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and not data.startswith("data:"):
+            if not data:
+                self.fail("required")
+            return data
+        return super().to_internal_value(data)
+
+
+class ImportIngredientSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    measurement_unit = serializers.CharField(max_length=200)
+    amount = serializers.IntegerField(
+        max_value=MAX_COUNT, min_value=MIN_COUNT)
+
+
+class ImportRecipeSerializer(serializers.Serializer):
+    """Строка NDJSON-импорта рецептов.
+
+    Проверяет только саму строку, без обращений к базе: автор, тэги
+    и ингредиенты разрешаются сразу для всей порции строк.
+    """
+    author = serializers.CharField(max_length=150, required=False)
+    name = serializers.CharField(max_length=200)
+    text = serializers.CharField()
+    cooking_time = serializers.IntegerField(
+        max_value=MAX_COUNT, min_value=MIN_COUNT)
+    image = ImportImageField()
+    tags = serializers.ListField(
+        child=serializers.SlugField(max_length=200), allow_empty=False)
+    ingredients = ImportIngredientSerializer(many=True, allow_empty=False)
+
+
+class RecipeImporter:
+    """Импорт рецептов из NDJSON порциями по batch_size строк.
+
+    На порцию приходится по одному запросу к авторам, тэгам и
+    ингредиентам и по одному bulk_create на рецепты, их ингредиенты
+    и тэги. Ошибки копятся построчно в errors: [(номер строки, ошибка)].
+    """
+
+    def __init__(self, author=None, batch_size=BATCH_SIZE):
+        self.default_author = author
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors = []
+
+    def run(self, lines):
+        numbered = enumerate(lines, start=1)
+        while True:
+            batch = list(itertools.islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self
+
+    def parse(self, batch):
+        valid = []
+        for number, line in batch:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as error:
+                self.errors.append((number, f"Некорректный JSON: {error}"))
+                continue
+            serializer = ImportRecipeSerializer(data=data)
+            if not serializer.is_valid():
+                self.errors.append((number, serializer.errors))
+                continue
+            recipe = serializer.validated_data
+            recipe.setdefault("author", self.default_author)
+            if not recipe["author"]:
+                self.errors.append((number, {"author": ["Не указан автор."]}))
+                continue
+            valid.append((number, recipe))
+        return valid
+
+    def resolve(self, valid):
+        """Заменяет имена автора, тэгов и ингредиентов на id."""
+        authors = dict(User.objects.filter(
+            username__in={recipe["author"] for _, recipe in valid}
+        ).values_list("username", "id"))
+        tags = dict(Tag.objects.filter(slug__in={
+            slug for _, recipe in valid for slug in recipe["tags"]
+        }).values_list("slug", "id"))
+        ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.filter(name__in={
+                item["name"] for _, recipe in valid
+                for item in recipe["ingredients"]
+            }).values_list("id", "name", "measurement_unit")
+        }
+
+        resolved = []
+        for number, recipe in valid:
+            errors = {}
+            if recipe["author"] not in authors:
+                errors["author"] = [
+                    f"Пользователь {recipe['author']} не найден."]
+            missing = [slug for slug in recipe["tags"] if slug not in tags]
+            if missing:
+                errors["tags"] = [f"Тэги не найдены: {', '.join(missing)}."]
+            amounts = {}
+            for item in recipe["ingredients"]:
+                key = (item["name"], item["measurement_unit"])
+                if key not in ingredients:
+                    errors.setdefault("ingredients", []).append(
+                        f"Ингредиент не найден: {key[0]}, {key[1]}.")
+                    continue
+                amounts[ingredients[key]] = (
+                    amounts.get(ingredients[key], 0) + item["amount"])
+            if errors:
+                self.errors.append((number, errors))
+                continue
+            resolved.append((
+                Recipe(
+                    author_id=authors[recipe["author"]],
+                    name=recipe["name"],
+                    text=recipe["text"],
+                    cooking_time=recipe["cooking_time"],
+                    image=recipe["image"],
+                ),
+                {tags[slug] for slug in recipe["tags"]},
+                amounts,
+            ))
+        return resolved
+
+    def import_batch(self, batch):
+        resolved = self.resolve(self.parse(batch))
+        if not resolved:
+            return
+        recipes = [recipe for recipe, _, _ in resolved]
+        features = connections[Recipe.objects.db].features
+        with transaction.atomic():
+            if features.can_return_rows_from_bulk_insert:
+                Recipe.objects.bulk_create(recipes)
+            else:
+                for recipe in recipes:
+                    recipe.save()
+            for recipe in recipes:
+                schedule_variants(recipe)
+            RecipeIngredient.objects.bulk_create(
+                (
+                    RecipeIngredient(
+                        recipe=recipe, ingredient_id=pk, amount=amount)
+                    for recipe, _, amounts in resolved
+                    for pk, amount in amounts.items()
+                ),
+                batch_size=self.batch_size,
+            )
+            Recipe.tags.through.objects.bulk_create(
+                (
+                    Recipe.tags.through(recipe=recipe, tag_id=pk)
+                    for recipe, tag_ids, _ in resolved
+                    for pk in tag_ids
+                ),
+                batch_size=self.batch_size,
+            )
+            for author_id, count in Counter(
+                recipe.author_id for recipe in recipes
+            ).items():
+                counters.change(User, author_id, "recipes_count", count)
+        self.created += len(recipes)
+
+
+def export_lines(queryset, chunk_size=BATCH_SIZE):
+    """Рецепты в формате NDJSON, который принимает RecipeImporter.
+
+    Рецепты читаются через iterator(chunk_size), тэги и ингредиенты
+    догружаются двумя запросами на каждую порцию, поэтому расход памяти
+    не зависит от числа рецептов.
+    """
+    recipes = queryset.select_related("author").order_by("id").iterator(
+        chunk_size=chunk_size)
+    while True:
+        batch = list(itertools.islice(recipes, chunk_size))
+        if not batch:
+            break
+        ids = [recipe.id for recipe in batch]
+        tags = {}
+        for recipe_id, slug in Recipe.tags.through.objects.filter(
+                recipe_id__in=ids).values_list("recipe_id", "tag__slug"):
+            tags.setdefault(recipe_id, []).append(slug)
+        ingredients = {}
+        for recipe_id, name, unit, amount in RecipeIngredient.objects.filter(
+            recipe_id__in=ids
+        ).order_by("id").values_list(
+            "recipe_id", "ingredient__name", "ingredient__measurement_unit",
+            "amount",
+        ):
+            ingredients.setdefault(recipe_id, []).append({
+                "name": name, "measurement_unit": unit, "amount": amount})
+        for recipe in batch:
+            yield json.dumps({
+                "author": recipe.author.username,
+                "name": recipe.name,
+                "text": recipe.text,
+                "cooking_time": recipe.cooking_time,
+                "image": recipe.image.name,
+                "tags": tags.get(recipe.id, []),
+                "ingredients": ingredients.get(recipe.id, []),
+            }, ensure_ascii=False) + "\n"
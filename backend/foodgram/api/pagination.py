@@ -1,6 +1,218 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+
+from core.counts import estimated_count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator с кэшированным или оценочным COUNT(*).
+
+    Точное число записей кэшируется на cache_timeout секунд по тексту
+    SQL-запроса, то есть отдельно для каждого набора фильтров. Для
+    больших таблиц Postgres без фильтров берётся оценка планировщика
+    (core.counts.estimated_count).
+    """
+    cache_timeout = 30
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query"):
+            return super().count
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = "pagination-count:" + md5(
+            f"{queryset.db}:{sql}:{params}".encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = estimated_count(queryset)
+            if count is None:
+                count = queryset.count()
+            cache.set(key, count, self.cache_timeout)
+        return count
+
+
+class UncountedPaginator(Paginator):
+    """Paginator без COUNT(*): наличие следующей страницы определяется
+    выборкой одной лишней записи."""
+    count = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы не является числом")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage("Страница не содержит результатов")
+        self.num_pages = number + 1 if len(items) > self.per_page else number
+        return self._get_page(items[:self.per_page], number, self)
+
+
+class FoodgramCursorPagination(CursorPagination):
+    """Keyset-пагинация по составному ключу сортировки.
+
+    Курсор хранит значения всех полей сортировки последней (или первой)
+    записи страницы, поэтому любая страница выбирается одним запросом
+    с условием по ключу, без OFFSET и COUNT(*).
+    """
+    page_size = 6
+    page_size_query_param = "limit"
+    ordering = ("-id",)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "cursor_ordering", self.ordering))
+
+    def decode_cursor(self, request):
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        cursor = super().decode_cursor(request)
+        if cursor.position is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            position = self.decode_position(queryset.model, self.cursor)
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        if self.page:
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering)
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering)
+        else:
+            self.has_next = self.has_previous = False
+        return self.page
+
+    def keyset_filter(self, ordering, position):
+        """Условие «строго после позиции» для составного ключа."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_position(self, model, cursor):
+        try:
+            values = json.loads(cursor.position)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            instance._meta.get_field(field.lstrip("-")).value_to_string(
+                instance)
+            for field in ordering
+        ])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position))
 
 
 class FoodgramPagination(PageNumberPagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    Если в запросе передан параметр cursor (пустой для первой страницы),
+    ответ строится keyset-пагинацией по view.cursor_ordering.
+    """
     page_size = 6
     page_size_query_param = "limit"
+    cursor_pagination_class = FoodgramCursorPagination
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FoodgramCountPagination(FoodgramPagination):
+    """Пагинация с дешёвым подсчётом общего числа записей.
+
+    Число записей берётся из кэша или оценки планировщика, а при
+    count=0 не считается вовсе: в ответе count будет null.
+    """
+    django_paginator_class = CachedCountPaginator
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.count_query_param) in ("0", "false"):
+            self.django_paginator_class = UncountedPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if (
+            page_number in self.last_page_strings
+            and paginator.count is None
+        ):
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message="Последняя страница неизвестна без подсчёта",
+            ))
+        return super().get_page_number(request, paginator)
@@ -0,0 +1,70 @@
+import json
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = "request_too_large"
+
+    def __init__(self):
+        super().__init__(
+            f"Размер запроса больше {settings.RECIPE_REQUEST_MAX_SIZE} байт.")
+
+
+def check_content_length(parser_context):
+    """Отклоняет запрос рецепта по заголовку Content-Length, не читая
+    тело."""
+    request = parser_context["request"]
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > settings.RECIPE_REQUEST_MAX_SIZE:
+        raise RequestTooLarge()
+
+
+class RecipeJSONParser(JSONParser):
+    """JSON рецепта с картинкой в base64. Тело читается не больше
+    RECIPE_REQUEST_MAX_SIZE байт: JSONParser DRF не учитывает
+    DATA_UPLOAD_MAX_MEMORY_SIZE."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        check_content_length(parser_context)
+        limit = settings.RECIPE_REQUEST_MAX_SIZE
+        body = stream.read(limit + 1)
+        if len(body) > limit:
+            raise RequestTooLarge()
+        return super().parse(BytesIO(body), media_type, parser_context)
+
+
+class RecipeMultiPartParser(MultiPartParser):
+    """multipart/form-data для рецептов: картинка передаётся файлом
+    и пишется на диск порциями, ingredients — JSON-строкой, tags —
+    повторяющимся полем или JSON-списком."""
+    json_fields = ("ingredients",)
+    list_fields = ("tags",)
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        check_content_length(parser_context)
+        parsed = super().parse(stream, media_type, parser_context)
+        data = {}
+        for key, values in parsed.data.lists():
+            try:
+                if key in self.json_fields:
+                    data[key] = json.loads(values[-1])
+                elif key in self.list_fields and len(values) == 1 and (
+                        values[0].startswith("[")):
+                    data[key] = json.loads(values[0])
+                elif key in self.list_fields:
+                    data[key] = values
+                else:
+                    data[key] = values[-1]
+            except ValueError as error:
+                raise ParseError(f"Поле {key}: некорректный JSON. {error}")
+        files = {key: parsed.files[key] for key in parsed.files}
+        return DataAndFiles(data, files)
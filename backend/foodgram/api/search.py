@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Case, IntegerField, Lookup, Q, Value, When
+from django.db.models.functions import Length, Lower
+
+from recipes.models import Ingredient
+from .cache import get_reference_version
+from .db_router import use_primary
+
+PREFIX_END = "\U0010ffff"
+TRIGRAM_MIN_LENGTH = 3
+
+
+class TrigramSimilar(Lookup):
+    """Оператор pg_trgm «%»: похожесть строк по триграммам."""
+    lookup_name = "trigram_similar"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %% {rhs}", lhs_params + rhs_params
+
+
+Lower.register_lookup(TrigramSimilar)
+
+
+def normalize(value):
+    """Приводит строку к виду для сравнения без учёта регистра.
+
+    str.casefold корректно обрабатывает кириллицу, в отличие от LIKE
+    в SQLite, который сравнивает без учёта регистра только ASCII.
+    """
+    return " ".join(value.casefold().split())
+
+
+class IngredientIndex:
+    """Префиксный индекс названий ингредиентов в памяти процесса.
+
+    Названия хранятся отсортированными, поэтому диапазон совпадений
+    находится двоичным поиском. Индекс перестраивается, когда меняется
+    версия справочника ингредиентов: сразу после записи через этот кэш
+    и не позже CACHE_VERSION_TIMEOUT секунд после записи другим
+    процессом, если кэш не общий.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.lock = Lock()
+
+    def build(self, version):
+        with use_primary():
+            rows = list(Ingredient.objects.order_by().values_list(
+                "id", "name", "measurement_unit"))
+        entries = sorted((
+            (normalize(name), {
+                "id": pk, "name": name, "measurement_unit": unit,
+            })
+            for pk, name, unit in rows
+        ), key=lambda entry: entry[0])
+        self.snapshot = (
+            version,
+            [key for key, _ in entries],
+            [entry for _, entry in entries],
+        )
+
+    def get_snapshot(self):
+        version = get_reference_version(Ingredient)
+        if self.snapshot is None or self.snapshot[0] != version:
+            with self.lock:
+                if self.snapshot is None or self.snapshot[0] != version:
+                    self.build(version)
+        return self.snapshot
+
+    def warm_up(self):
+        if settings.INGREDIENT_SEARCH_MODE == "database":
+            return
+        try:
+            self.get_snapshot()
+        except DatabaseError:
+            self.snapshot = None
+
+    def search(self, query):
+        """Ингредиенты, название которых начинается с query.
+
+        Сначала точное совпадение, затем более короткие названия.
+        """
+        _, keys, entries = self.get_snapshot()
+        prefix = normalize(query)
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + PREFIX_END, start)
+        matches = sorted(
+            range(start, end),
+            key=lambda index: (
+                keys[index] != prefix, len(keys[index]), keys[index]),
+        )
+        return [entries[index] for index in matches]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_in_database(query):
+    """Поиск ингредиентов по индексам базы данных.
+
+    На Postgres префикс ищется по btree-индексу lower(name)
+    varchar_pattern_ops, подстрока и опечатки — по GIN-индексу
+    с триграммами. Совпадения по префиксу идут выше совпадений
+    по подстроке. На остальных базах названия сравниваются в Python.
+    """
+    term = normalize(query)
+    queryset = Ingredient.objects.annotate(lower_name=Lower("name"))
+    if connections[queryset.db].vendor != "postgresql":
+        return search_in_python(queryset, term)
+    condition = Q(lower_name__startswith=term)
+    if len(term) >= TRIGRAM_MIN_LENGTH:
+        condition |= Q(lower_name__contains=term)
+        condition |= Q(lower_name__trigram_similar=term)
+    return list(queryset.filter(condition).annotate(
+        rank=Case(
+            When(lower_name=term, then=Value(0)),
+            When(lower_name__startswith=term, then=Value(1)),
+            When(lower_name__contains=term, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        ),
+    ).order_by("rank", Length("name"), "name").values(
+        "id", "name", "measurement_unit"))
+
+
+def search_in_python(queryset, term):
+    """Запасной поиск для SQLite: lower() и LIKE в SQLite не учитывают
+    регистр кириллицы. Таблица читается целиком, поэтому режим годится
+    только для разработки. Порядок тот же, что у search_in_database."""
+    matches = []
+    for entry in queryset.order_by().values("id", "name", "measurement_unit"):
+        key = normalize(entry["name"])
+        if key == term:
+            rank = 0
+        elif key.startswith(term):
+            rank = 1
+        elif len(term) >= TRIGRAM_MIN_LENGTH and term in key:
+            rank = 2
+        else:
+            continue
+        matches.append(((rank, len(entry["name"]), entry["name"]), entry))
+    return [entry for _, entry in sorted(matches, key=lambda item: item[0])]
+
+
+def search_ingredients(query):
+    if settings.INGREDIENT_SEARCH_MODE == "database":
+        return search_in_database(query)
+    return ingredient_index.search(query)
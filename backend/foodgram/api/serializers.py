@@ -1,12 +1,24 @@
+import binascii
+from base64 import b64decode
+from collections import defaultdict
+from tempfile import TemporaryFile
+from uuid import uuid4
+
 import webcolors
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator, ValidationError
 
+from recipes import totals
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingList, Tag)
 from users.models import Subscription, User
+from .images import schedule_variants, variant_urls
 
 
 MIN_COUNT = 1
@@ -36,7 +48,30 @@ class UserRegistrationSerializer(UserCreateSerializer):
         )
 
 
-class UserProfileSerializer(UserSerializer):
+class IsSubscribedMixin:
+    """Признак подписки текущего пользователя на сериализуемого автора.
+
+    Id авторов, на которых подписан пользователь, загружаются одним
+    запросом и запоминаются в объекте запроса, поэтому все вложенные
+    сериализаторы ответа используют один и тот же набор.
+    """
+
+    def get_subscribed_ids(self):
+        request = self.context.get("request")
+        if not request.user.is_authenticated:
+            return frozenset()
+        if not hasattr(request, "subscribed_ids"):
+            request.subscribed_ids = frozenset(
+                request.user.follower.values_list("author_id", flat=True))
+        return request.subscribed_ids
+
+    def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+        return obj.id in self.get_subscribed_ids()
+
+
+class UserProfileSerializer(IsSubscribedMixin, UserSerializer):
     """Сериализатор профиля пользователя."""
     is_subscribed = serializers.SerializerMethodField()
 
@@ -51,14 +86,6 @@ class UserProfileSerializer(UserSerializer):
             "is_subscribed"
         )
 
-    def get_is_subscribed(self, obj):
-        current_user = self.context.get("request").user
-        return (
-            current_user.follower.filter(author=obj).exists()
-            if current_user.is_authenticated
-            else False
-        )
-
 
 class Hex2NameColor(serializers.Field):
     """Класс для преобразования шестнадцатеричного кода цвета в его имя."""
@@ -73,6 +100,67 @@ class Hex2NameColor(serializers.Field):
         return data
 
 
+class RecipeImageField(serializers.ImageField):
+    """Картинка рецепта в base64 (data URI) или файлом из multipart.
+
+    Размер проверяется до декодирования: для base64 — по длине строки,
+    для файла — по размеру загрузки. base64 декодируется порциями во
+    временный файл, поэтому декодированная картинка целиком в памяти
+    не оказывается.
+    """
+    default_error_messages = {
+        "too_large": "Размер картинки больше {max_size} байт.",
+        "invalid_base64": "Некорректная картинка в base64.",
+        "invalid_image": "Загрузите корректную картинку.",
+    }
+    formats = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = self.decode_base64(data)
+        elif getattr(data, "size", None) is None:
+            self.fail("invalid_image")
+        elif data.size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail("too_large", max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        data.name = f"{uuid4().hex}.{self.verify_image(data)}"
+        return data
+
+    def decode_base64(self, data):
+        separator = data.find(";base64,")
+        if separator == -1 or not data.startswith("data:image/"):
+            self.fail("invalid_base64")
+        start = separator + len(";base64,")
+        size = (len(data) - start) * 3 // 4 - data[-2:].count("=")
+        if size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail("too_large", max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        upload = File(TemporaryFile(), name="image")
+        step = settings.RECIPE_IMAGE_CHUNK_SIZE // 3 * 4
+        try:
+            for position in range(start, len(data), step):
+                upload.write(b64decode(
+                    data[position:position + step], validate=True))
+        except binascii.Error:
+            upload.close()
+            self.fail("invalid_base64")
+        upload.seek(0)
+        return upload
+
+    def verify_image(self, file):
+        """Проверяет заголовок и целостность картинки, не декодируя
+        пиксели, и возвращает расширение по фактическому формату."""
+        try:
+            image = Image.open(file)
+            image_format = image.format
+            image.verify()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            self.fail("invalid_image")
+        finally:
+            file.seek(0)
+        if image_format not in self.formats:
+            self.fail("invalid_image")
+        return self.formats[image_format]
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тэга."""
     color = Hex2NameColor()
@@ -114,6 +202,7 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -126,15 +215,26 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, "is_author_subscribed"):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj, self.context.get("request"))
+
     def get_ingredients(self, obj):
         ingredients = obj.recipe_ingredients.all()
         return ReadRecipeIngredientSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         current_user = self.context.get("request").user
         return (
             current_user.favorites.filter(recipe=obj).exists()
@@ -143,6 +243,8 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         current_user = self.context.get("request").user
         return (
             current_user.shopping_lists.filter(recipe=obj).exists()
@@ -171,7 +273,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         many=True
     )
     author = UserProfileSerializer(read_only=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
     ingredients = CreateRecipeIngredientSerializer(many=True)
     cooking_time = serializers.IntegerField(
         max_value=MAX_COUNT, min_value=MIN_COUNT)
@@ -203,6 +305,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             )
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
@@ -210,20 +313,79 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.create_ingredients(recipe, ingredients)
         recipe.tags.set(tags)
+        schedule_variants(recipe)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """Приводит ингредиенты рецепта к переданным, меняя только
+        отличающиеся строки.
+
+        Повторы ингредиента в запросе складываются. Удалённые строки
+        вычитаются из итогов списков покупок сигналами, а изменённые
+        и добавленные пишутся bulk-запросами без сигналов, поэтому их
+        итоги меняются здесь.
+        """
+        new_amounts = defaultdict(int)
+        for ingredient in ingredients:
+            new_amounts[ingredient["id"].id] += ingredient["amount"]
+        kept = {}
+        removed = []
+        for row in recipe.recipe_ingredients.all():
+            if row.ingredient_id in new_amounts and (
+                    row.ingredient_id not in kept):
+                kept[row.ingredient_id] = row
+            else:
+                removed.append(row.id)
+        changed = []
+        old_amounts = {}
+        for ingredient_id, row in kept.items():
+            if row.amount != new_amounts[ingredient_id]:
+                old_amounts[ingredient_id] = row.amount
+                row.amount = new_amounts[ingredient_id]
+                changed.append(row)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        added = [
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount)
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in kept
+        ]
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        totals.change_recipe(recipe.id, old_amounts, {
+            row.ingredient_id: row.amount for row in changed + added})
+
+    def replace_image(self, instance, image):
+        """Сохраняет новую картинку и возвращает прежнее имя файла, если
+        оно сменилось. Одинаковая картинка получает то же имя, и её
+        копии остаются действительными."""
+        old_name = instance.image.name
+        instance.image = image
+        Recipe._meta.get_field("image").pre_save(instance, False)
+        if instance.image.name == old_name:
+            return None
+        instance.image_variants = {}
+        return old_name
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
         instance.name = validated_data.get("name", instance.name)
-        instance.image = validated_data.get("image", instance.image)
+        old_image = None
+        if "image" in validated_data:
+            old_image = self.replace_image(instance, validated_data["image"])
         instance.text = validated_data.get("text", instance.text)
         instance.cooking_time = validated_data.get(
             "cooking_time", instance.cooking_time)
         instance.tags.set(tags)
-        instance.ingredients.all().delete()
-        self.create_ingredients(instance, ingredients)
+        self.update_ingredients(instance, ingredients)
         instance.save()
+        if old_image is not None:
+            schedule_variants(instance)
         return instance
 
     def to_representation(self, instance):
@@ -258,9 +420,9 @@ class FavorShopRecipeSerializer(serializers.ModelSerializer):
         return data
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(IsSubscribedMixin, serializers.ModelSerializer):
     """Сериализатор для подписок."""
-    recipes_count = serializers.SerializerMethodField(read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
     is_subscribed = serializers.SerializerMethodField(read_only=True)
     recipes = FavorShopRecipeSerializer(many=True, read_only=True)
 
@@ -277,17 +439,6 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             "recipes_count",
         )
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.all().count()
-
-    def get_is_subscribed(self, obj):
-        current_user = self.context.get("request").user
-        return (
-            current_user.follower.filter(author=obj).exists()
-            if current_user.is_authenticated
-            else False
-        )
-
     def validate(self, data):
         current_user = self.context.get("request").user
         if Subscription.objects.filter(user=current_user, author=data["id"]
@@ -0,0 +1,82 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+from .authentication import invalidate_tokens
+from .cache import bump_recipe_versions, bump_reference_version
+
+USER_PROFILE_FIELDS = {"email", "username", "first_name", "last_name"}
+
+
+def bump_on_commit(bump, *args):
+    """Меняет версии кэша после фиксации транзакции.
+
+    Если сменить версию раньше, параллельный запрос успеет закэшировать
+    под новой версией ещё не зафиксированные, то есть старые данные.
+    """
+    transaction.on_commit(partial(bump, *args))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    bump_on_commit(bump_recipe_versions, [instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient(sender, instance, **kwargs):
+    bump_on_commit(bump_recipe_versions, [instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bump_on_commit(bump_recipe_versions, [instance.pk])
+    elif pk_set:
+        bump_on_commit(bump_recipe_versions, list(pk_set))
+    else:
+        bump_on_commit(bump_reference_version, Tag)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    if created or (
+        update_fields and not USER_PROFILE_FIELDS & set(update_fields)
+    ):
+        return
+    bump_on_commit(
+        bump_recipe_versions,
+        list(instance.recipes.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Смена пароля, деактивация и правка профиля сбрасывают
+    закэшированного вместе с токеном пользователя."""
+    if not created:
+        invalidate_tokens(
+            Token.objects.filter(user=instance).values_list("key", flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    # В том числе выход через djoser (token_destroy): он удаляет токен.
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_references(sender, **kwargs):
+    bump_on_commit(bump_reference_version, sender)
@@ -0,0 +1,145 @@
+import shutil
+import tempfile
+
+from django.forms import FileField
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import local_tokens
+from recipes import counters
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingList, Tag)
+from recipes.totals import rebuild_totals
+from users.models import Subscription, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+AUTHORS_COUNT = 14
+RECIPES_PER_AUTHOR = 2
+INGREDIENTS_COUNT = 30
+INGREDIENTS_PER_RECIPE = 4
+
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA"
+    "DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+def admin_form_data(response):
+    """Данные формы изменения в админке со всеми inline, как их
+    отправил бы браузер без правок."""
+    forms = [response.context["adminform"].form]
+    data = {}
+    for formset in response.context["inline_admin_formsets"]:
+        formset = formset.formset
+        forms += formset.forms
+        for name, field in formset.management_form.fields.items():
+            data[formset.management_form.add_prefix(name)] = (
+                formset.management_form[name].value())
+    for form in forms:
+        for name, field in form.fields.items():
+            value = form[name].value()
+            if isinstance(field, FileField) or value in (None, False):
+                continue
+            data[form.add_prefix(name)] = (
+                "on" if value is True
+                else [str(item) for item in value]
+                if isinstance(value, (list, tuple)) else str(value))
+    return data
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RECIPE_IMAGE_WORKERS=0)
+class FoodgramTestCase(TestCase):
+    """Общие данные тестов API: авторы с рецептами, тэги, ингредиенты,
+    избранное, список покупок и подписки читателя, клиенты anon, auth
+    (читатель) и author (первый автор).
+
+    Копии картинок строятся в текущем потоке: поток пула пережил бы тест
+    и писал бы в базу параллельно с ним.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", email="reader@foodgram.ru", password="pass")
+        cls.authors = [
+            User.objects.create(
+                username=f"author{i}", email=f"author{i}@foodgram.ru")
+            for i in range(AUTHORS_COUNT)
+        ]
+        cls.tags = [
+            Tag.objects.create(
+                name=f"Тэг {i}", color=f"#00000{i}", slug=f"tag{i}")
+            for i in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {i}", measurement_unit="г")
+            for i in range(INGREDIENTS_COUNT)
+        ]
+        for author in cls.authors:
+            for i in range(RECIPES_PER_AUTHOR):
+                recipe = Recipe.objects.create(
+                    author=author,
+                    name=f"Рецепт {author.username} {i}",
+                    image="recipes/budget.png",
+                    text="Описание",
+                    cooking_time=10,
+                )
+                recipe.tags.set(cls.tags[:2])
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=cls.ingredients[
+                            (recipe.id + j) % INGREDIENTS_COUNT],
+                        amount=j + 1,
+                    )
+                    for j in range(INGREDIENTS_PER_RECIPE)
+                )
+        cls.recipes = list(Recipe.objects.all())
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[::2]
+        )
+        ShoppingList.objects.bulk_create(
+            ShoppingList(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[::2]
+        )
+        Subscription.objects.bulk_create(
+            Subscription(user=cls.user, author=author)
+            for author in cls.authors[1:]
+        )
+        rebuild_totals()
+        counters.reconcile(Recipe)
+        counters.reconcile(User)
+        cls.cart_size = len(cls.recipes[::2])
+        cls.token = Token.objects.create(user=cls.user)
+        cls.author_token = Token.objects.create(user=cls.authors[0])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        local_tokens.clear()
+        self.anon = APIClient()
+        self.auth = APIClient()
+        self.auth.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.author = APIClient()
+        self.author.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.author_token.key}")
+
+    def recipe_payload(self):
+        return {
+            "ingredients": [
+                {"id": ingredient.id, "amount": 10}
+                for ingredient in self.ingredients[:INGREDIENTS_PER_RECIPE]
+            ],
+            "tags": [tag.id for tag in self.tags],
+            "image": IMAGE,
+            "name": "Новый рецепт",
+            "text": "Описание",
+            "cooking_time": 5,
+        }
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.counts import estimated_count
+from recipes import counters
+from recipes.models import Favorite, Recipe, ShoppingList
+from users.models import Subscription, User
+
+CHANGELISTS = (
+    "/admin/recipes/recipe/",
+    "/admin/recipes/favorite/",
+    "/admin/recipes/shoppinglist/",
+    "/admin/recipes/recipeingredient/",
+    "/admin/recipes/ingredient/",
+    "/admin/users/user/",
+    "/admin/users/subscription/",
+)
+
+
+class AdminChangelistTests(TestCase):
+    """Списки админки не зависят по числу запросов от размера таблиц."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@foodgram.ru", password="pass")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        users = [
+            User.objects.create(
+                username=f"user{start + i}",
+                email=f"user{start + i}@foodgram.ru")
+            for i in range(count)
+        ]
+        for user in users:
+            recipe = Recipe.objects.create(
+                author=user, name=f"Рецепт {user.username}",
+                image="recipes/admin.png", text="Описание", cooking_time=5)
+            Favorite.objects.create(user=self.admin, recipe=recipe)
+            ShoppingList.objects.create(user=user, recipe=recipe)
+            Subscription.objects.create(user=self.admin, author=user)
+        counters.reconcile(Recipe)
+        counters.reconcile(User)
+        return users
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow(self):
+        self.add_rows(2)
+        small = {url: self.changelist_queries(url) for url in CHANGELISTS}
+        self.add_rows(10)
+        large = {url: self.changelist_queries(url) for url in CHANGELISTS}
+        self.assertEqual(small, large)
+
+    def test_autocomplete_filter(self):
+        first, second = self.add_rows(2)
+        response = self.client.get(
+            "/admin/recipes/recipe/", {"author__id__exact": first.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 1)
+        content = response.content.decode()
+        self.assertIn("admin-autocomplete-filter", content)
+        self.assertIn(f'<option value="{first.id}" selected>', content)
+        self.assertNotIn(f'<option value="{second.id}"', content)
+        self.assertNotIn(second.username, content)
+        self.assertIn("admin/js/autocomplete_filter.js", content)
+
+        response = self.client.get("/admin/autocomplete/", {
+            "app_label": "recipes", "model_name": "recipe",
+            "field_name": "author", "term": second.username,
+        })
+        self.assertEqual(
+            [result["id"] for result in response.json()["results"]],
+            [str(second.id)])
+
+    def test_estimated_count(self):
+        self.add_rows(2)
+        if connection.vendor != "postgresql":
+            self.assertIsNone(estimated_count(User.objects.all()))
+        self.assertIsNone(estimated_count(User.objects.filter(id=1)))
+        with mock.patch("core.admin_utils.estimated_count",
+                        return_value=123456):
+            response = self.client.get("/admin/users/user/")
+        self.assertEqual(response.context["cl"].result_count, 123456)
+        cache.clear()
+        with mock.patch("api.pagination.estimated_count",
+                        return_value=123456):
+            response = self.client.get("/api/recipes/")
+        self.assertEqual(response.json()["count"], 123456)
@@ -0,0 +1,106 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import (AsyncClient, Client, TransactionTestCase,
+                         override_settings)
+from django.http import StreamingHttpResponse
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+
+from api import urls as api_urls
+from api.async_views import async_read_urls, spool_streaming
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingList, Tag)
+from recipes.totals import rebuild_totals
+from users.models import User
+
+urlpatterns = [
+    path("api/", include(([
+        pattern for pattern in api_urls.urlpatterns
+        if getattr(pattern, "urlconf_name", None) is not api_urls.router_urls
+    ] + [
+        path("", include(async_read_urls(api_urls.router.urls))),
+    ], "api"))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadViewsTests(TransactionTestCase):
+    """Асинхронные view ASGI-режима отвечают так же, как синхронные.
+
+    TransactionTestCase: чтения выполняются в других потоках и должны
+    видеть зафиксированные данные.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="reader", email="reader@foodgram.ru", password="pass")
+        tag = Tag.objects.create(name="Тэг", color="#000000", slug="tag")
+        ingredient = Ingredient.objects.create(
+            name="Ингредиент", measurement_unit="г")
+        self.recipe = Recipe.objects.create(
+            author=self.user, name="Рецепт", image="recipes/async.png",
+            text="Описание", cooking_time=10)
+        self.recipe.tags.set([tag])
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=ingredient, amount=5)
+        ShoppingList.objects.create(user=self.user, recipe=self.recipe)
+        rebuild_totals()
+        self.token = Token.objects.create(user=self.user).key
+
+    def request(self, method, url):
+        # AsyncClient передаёт extra как ASGI-заголовки, без префикса HTTP_.
+        return async_to_sync(getattr(AsyncClient(), method))(
+            url, authorization=f"Token {self.token}")
+
+    def test_read_paths_match_sync_views(self):
+        sync_client = Client()
+        for url in (
+            "/api/recipes/",
+            f"/api/recipes/{self.recipe.id}/",
+            "/api/tags/",
+            "/api/ingredients/?name=инг",
+        ):
+            response = self.request("get", url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(
+                json.loads(response.content),
+                json.loads(sync_client.get(
+                    url, HTTP_AUTHORIZATION=f"Token {self.token}").content),
+                url)
+
+    def test_download_is_spooled(self):
+        response = self.request(
+            "get", "/api/recipes/download_shopping_cart/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="shopping_list.txt"')
+        self.assertEqual(
+            response["Content-Type"], "text/plain; charset=utf-8")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Ингредиент - 5 г", content)
+        self.assertEqual(int(response["Content-Length"]),
+                         len(content.encode()))
+
+    def test_large_download_spills_to_disk(self):
+        lines = [f"Продукт {i:05} - 7 г\n" for i in range(2000)]
+        response = StreamingHttpResponse(
+            (line.encode() for line in lines), content_type="text/plain")
+        response["Content-Disposition"] = "attachment"
+        with mock.patch("api.async_views.SPOOL_MAX_SIZE", 1024):
+            spooled = spool_streaming(response)
+        self.assertTrue(spooled.file_to_stream._rolled)
+        self.assertEqual(spooled["Content-Disposition"], "attachment")
+        content = b"".join(spooled.streaming_content).decode()
+        self.assertEqual(content, "".join(lines))
+        self.assertEqual(
+            int(spooled["Content-Length"]), len(content.encode()))
+
+    def test_write_paths_unchanged(self):
+        response = self.request(
+            "delete", f"/api/recipes/{self.recipe.id}/shopping_cart/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingList.objects.exists())
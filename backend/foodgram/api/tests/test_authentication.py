@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.authentication import local_tokens
+from api.tests.base import FoodgramTestCase
+
+
+class TokenCacheTests(FoodgramTestCase):
+    """Кэширование токенов и их сброс."""
+
+    def test_token_authentication_cached(self):
+        self.auth.get("/api/tags/")
+        with CaptureQueriesContext(connection) as context:
+            response = self.auth.get("/api/tags/")
+            local_tokens.clear()
+            self.auth.get("/api/tags/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context), 0)
+
+        self.author.get("/api/users/me/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authors[0].is_active = False
+            self.authors[0].save()
+        response = self.author.get("/api/users/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.auth.get("/api/users/me/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.auth.post("/api/users/set_password/", {
+                "current_password": "pass", "new_password": "Nw-pass-2024"})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(local_tokens.get(self.token.key))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.auth.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.auth.get("/api/users/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,106 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import RECIPE_VERSION_KEY, get_reference_version, get_versions
+from api.tests.base import FoodgramTestCase
+from recipes.models import Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+class CacheVersionTests(TestCase):
+    """Версии кэша меняются только после фиксации транзакции."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username="author", email="author@foodgram.ru")
+        cls.tag = Tag.objects.create(
+            name="Завтрак", color="#FFFFFF", slug="breakfast")
+        cls.ingredient = Ingredient.objects.create(
+            name="Мука", measurement_unit="г")
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name="Блины", image="recipes/cache.png",
+            text="Описание", cooking_time=10)
+
+    def recipe_version(self, pk=None):
+        pk = pk or self.recipe.pk
+        return get_versions(RECIPE_VERSION_KEY.format(pk))[0]
+
+    def assertBumpedOnCommit(self, version, write):
+        before = version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            write()
+            self.assertEqual(version(), before)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(version(), before)
+
+    def test_recipe_version(self):
+        writes = (
+            self.recipe.save,
+            lambda: self.recipe.tags.add(self.tag),
+            lambda: self.tag.recipe_set.remove(self.recipe),
+            lambda: RecipeIngredient.objects.create(
+                recipe=self.recipe, ingredient=self.ingredient, amount=5),
+            lambda: self.recipe.recipe_ingredients.all().delete(),
+            lambda: self.author.save(update_fields=["first_name"]),
+        )
+        for write in writes:
+            with self.subTest(write=write):
+                self.assertBumpedOnCommit(self.recipe_version, write)
+
+    def test_recipe_version_on_delete(self):
+        pk = self.recipe.pk
+        self.assertBumpedOnCommit(
+            lambda: self.recipe_version(pk), self.recipe.delete)
+
+    def test_reference_version(self):
+        self.assertBumpedOnCommit(
+            lambda: get_reference_version(Tag), self.tag.save)
+        self.assertBumpedOnCommit(
+            lambda: get_reference_version(Ingredient), self.ingredient.save)
+        self.assertBumpedOnCommit(
+            lambda: get_reference_version(Tag), self.tag.recipe_set.clear)
+
+    def test_versions_expire(self):
+        # Запись другого процесса не меняет версию в кэше этого процесса,
+        # но версия истекает через CACHE_VERSION_TIMEOUT секунд.
+        versions = (get_reference_version(Tag), self.recipe_version())
+        expired = time.time() + settings.CACHE_VERSION_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time",
+                        return_value=expired):
+            self.assertNotEqual(get_reference_version(Tag), versions[0])
+            self.assertNotEqual(self.recipe_version(), versions[1])
+
+
+class RecipeDetailCacheTests(FoodgramTestCase):
+    """Общая часть карточки рецепта кэшируется, признаки пользователя
+    читаются из базы."""
+
+    def test_recipe_detail_cached(self):
+        recipe = self.authors[0].recipes.first()
+        url = f"/api/recipes/{recipe.id}/"
+        cache.clear()
+        cold = self.auth.get(url).data
+        with CaptureQueriesContext(connection) as context:
+            warm = self.auth.get(url).data
+            anonymous = self.anon.get(url).data
+        self.assertEqual(len(context), 1)
+        self.assertEqual(warm, cold)
+        self.assertFalse(anonymous["is_favorited"])
+        self.assertFalse(anonymous["author"]["is_subscribed"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.patch(url, self.recipe_payload(), format="json")
+        self.assertEqual(self.anon.get(url).data["name"], "Новый рецепт")
+        self.authors[0].first_name = "Автор"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authors[0].save()
+        self.assertEqual(
+            self.anon.get(url).data["author"]["first_name"], "Автор")
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        self.assertTrue(self.auth.get(url).data["is_favorited"])
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Tag
+
+
+class ReferenceConditionalGetTests(FoodgramTestCase):
+    """Условные GET-запросы к справочникам тэгов и ингредиентов."""
+
+    def test_reference_conditional_get(self):
+        cache.clear()
+        for url in ("/api/ingredients/?name=Ингр", "/api/tags/"):
+            first = self.anon.get(url)
+            with CaptureQueriesContext(connection) as context:
+                second = self.anon.get(url)
+                not_modified = self.anon.get(
+                    url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(len(context), 0)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(
+                not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name="Новый", color="#FFFFFF", slug="new")
+        response = self.anon.get(
+            "/api/tags/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), len(self.tags) + 1)
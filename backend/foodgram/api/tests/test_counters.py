@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from api.tests.base import FoodgramTestCase
+from recipes import counters
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class CounterTests(FoodgramTestCase):
+    """Денормализованные счётчики рецептов и пользователей."""
+
+    def assertCountersConsistent(self):
+        for model in counters.COUNTERS:
+            self.assertEqual(counters.drifted_ids(model), [], model)
+
+    def test_counters(self):
+        self.assertCountersConsistent()
+        recipe = self.authors[0].recipes.first()
+        url = f"/api/recipes/{recipe.id}/"
+        stale_recipe = Recipe.objects.get(id=recipe.id)
+        stale_author = User.objects.get(id=self.authors[0].id)
+        self.auth.post(f"{url}favorite/")
+        self.author.post(f"{url}favorite/")
+        self.author.post(f"{url}shopping_cart/")
+        self.anon.post(f"{url}favorite/")
+        self.auth.delete(f"/api/users/{self.authors[0].id}/subscribe/")
+        self.author.post("/api/recipes/", self.recipe_payload(),
+                         format="json")
+        self.assertCountersConsistent()
+        # save() прочитанного раньше экземпляра не затирает счётчики.
+        stale_recipe.text = "Новое описание"
+        stale_recipe.save()
+        stale_author.first_name = "Автор"
+        stale_author.save()
+        self.assertCountersConsistent()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 2)
+
+        self.author.delete(f"{url}favorite/")
+        self.author.delete(f"{url}shopping_cart/")
+        self.auth.post(f"/api/users/{self.authors[0].id}/subscribe/")
+        self.author.delete(url)
+        self.assertCountersConsistent()
+
+        User.objects.filter(id=self.user.id).update(recipes_count=5)
+        output = StringIO()
+        call_command("reconcile_counters", "--verify", stdout=output)
+        self.assertIn("разошлись у 1", output.getvalue())
+        call_command("reconcile_counters", stdout=output)
+        self.assertCountersConsistent()
+
+    def test_admin_deletes(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@foodgram.ru", password="pass")
+        self.client.force_login(admin)
+        recipe = self.authors[0].recipes.first()
+        self.author.post(f"/api/recipes/{recipe.id}/favorite/")
+        self.author.post(f"/api/users/{self.authors[1].id}/subscribe/")
+        favorite_ids = list(Favorite.objects.values_list("id", flat=True))
+        deletions = (
+            ("/admin/recipes/favorite/", {
+                "action": "delete_selected",
+                "_selected_action": favorite_ids,
+            }, Favorite.objects.filter(id__in=favorite_ids)),
+            (f"/admin/recipes/recipe/{recipe.id}/delete/", {},
+             Recipe.objects.filter(id=recipe.id)),
+            (f"/admin/users/user/{self.user.id}/delete/", {},
+             User.objects.filter(id=self.user.id)),
+        )
+        for url, data, deleted in deletions:
+            with self.subTest(url=url):
+                response = self.client.post(url, {**data, "post": "yes"})
+                self.assertEqual(response.status_code, 302)
+                self.assertFalse(deleted.exists())
+                self.assertCountersConsistent()
@@ -0,0 +1,33 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+
+PAGE = 2
+
+
+class CursorPaginationTests(FoodgramTestCase):
+    """Постраничный вывод по курсору (?cursor=)."""
+
+    def test_recipes_cursor_pages(self):
+        url = f"/api/recipes/?cursor=&limit={PAGE}"
+        seen = []
+        budgets = set()
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.anon.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            budgets.add(len(context))
+            seen.extend(recipe["id"] for recipe in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(len(budgets), 1, budgets)
+        self.assertEqual(
+            seen,
+            list(Recipe.objects.order_by(
+                "-pub_date", "-id").values_list("id", flat=True)))
+        previous = self.anon.get(response.data["previous"])
+        self.assertEqual(
+            [recipe["id"] for recipe in previous.data["results"]],
+            seen[-2 * PAGE:-PAGE])
@@ -0,0 +1,113 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.checks import check_shared_cache
+from api.mixins import rendered_responses
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+@skipUnless("replica" in settings.DATABASES,
+            "Реплика настроена только для DB_ENGINE=sqlite.")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Маршрутизация чтений на двух базах SQLite.
+
+    Реплика не получает записей основной базы, поэтому чтение из неё
+    видно по пустому ответу.
+    """
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        rendered_responses.clear()
+        self.user = User.objects.create_user(
+            username="writer", email="writer@foodgram.ru", password="pass")
+        self.recipe = Recipe.objects.create(
+            author=self.user, name="Рецепт", image="recipes/router.png",
+            text="Описание", cooking_time=10)
+        Tag.objects.create(name="Тэг", color="#000000", slug="tag")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token {}".format(
+            Token.objects.create(user=self.user).key))
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(APIClient().get("/api/recipes/").data["count"], 0)
+        self.user.save(using="replica")
+        Recipe(
+            id=self.recipe.id, author=self.user, name="С реплики",
+            image="recipes/router.png", text="Описание", cooking_time=5,
+        ).save(using="replica")
+        cache.clear()  # число рецептов кэшируется пагинатором
+        response = APIClient().get("/api/recipes/?limit=1")
+        self.assertEqual(
+            [recipe["name"] for recipe in response.data["results"]],
+            ["С реплики"])
+
+    def test_reads_stick_to_primary_after_write(self):
+        url = "/api/recipes/?is_favorited=1"
+        self.assertEqual(self.client.get(url).data["count"], 0)
+        response = self.client.post(f"/api/recipes/{self.recipe.id}/favorite/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(url).data["count"], 1)
+        # Другой клиент по-прежнему читает из реплики.
+        self.assertEqual(APIClient().get("/api/recipes/").data["count"], 0)
+
+        cache.clear()  # окно DATABASE_PRIMARY_STICKY_SECONDS истекло
+        self.assertEqual(self.client.get(url).data["count"], 0)
+
+    def test_auth_reads_use_primary(self):
+        response = self.client.get("/api/users/me/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["username"], "writer")
+        response = APIClient().post("/api/auth/token/login/", {
+            "email": "writer@foodgram.ru", "password": "pass"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_fill_reads_primary(self):
+        client = APIClient()
+        self.assertEqual(
+            [tag["slug"] for tag in client.get("/api/tags/").json()], ["tag"])
+        response = client.get(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Рецепт")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        self.assertEqual(APIClient().get("/api/recipes/").data["count"], 1)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Отметка о записи клиента и версии кэша видны только через общий
+    кэш."""
+
+    def check_with(self, backend, replicas=("replica_1",), debug=False):
+        with override_settings(
+            DATABASE_REPLICAS=list(replicas),
+            CACHES={"default": {"BACKEND": backend}},
+            DEBUG=debug,
+        ):
+            return [error.id for error in check_shared_cache(None)]
+
+    def test_process_local_cache(self):
+        for backend in ("locmem.LocMemCache", "dummy.DummyCache"):
+            for replicas, debug in ((("replica_1",), True), ((), False)):
+                with self.subTest(backend=backend, replicas=replicas):
+                    self.assertEqual(self.check_with(
+                        f"django.core.cache.backends.{backend}",
+                        replicas, debug), ["api.W001"])
+
+    def test_shared_cache_or_debug_without_replicas(self):
+        self.assertEqual(self.check_with(
+            "django.core.cache.backends.db.DatabaseCache"), [])
+        self.assertEqual(self.check_with(
+            "django.core.cache.backends.db.DatabaseCache", replicas=()), [])
+        self.assertEqual(self.check_with(
+            "django.core.cache.backends.locmem.LocMemCache", replicas=(),
+            debug=True), [])
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.images import get_storage, variant_name
+from recipes.models import Recipe
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+DAY = 24 * 60 * 60
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DedupeMediaTests(TestCase):
+    """Перевод картинок на имена по хэшу и удаление файлов без ссылок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username="author", email="author@foodgram.ru")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = get_storage()
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+    def write(self, name, content, age=0):
+        """Пишет файл в обход хэширования, как в старом каталоге media."""
+        path = os.path.join(MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+        saved = time.time() - age
+        os.utime(path, (saved, saved))
+        return name
+
+    def create_recipe(self, image):
+        return Recipe.objects.create(
+            author=self.author, name="Рецепт", image=image,
+            text="Описание", cooking_time=5)
+
+    def dedupe(self, *args):
+        output = StringIO()
+        call_command("dedupe_media", *args, stdout=output, stderr=output)
+        return output.getvalue()
+
+    def test_dedupe(self):
+        first = self.create_recipe(self.write("recipes/first.png", b"same"))
+        second = self.create_recipe(self.write("recipes/second.png", b"same"))
+        other = self.create_recipe(self.write("recipes/other.png", b"other"))
+        variant = self.write(
+            variant_name("recipes/first.png", "small", "webp"), b"small")
+
+        self.assertIn("Переименовано: 3, из них совпали с существующими: 1",
+                      self.dedupe("--dry-run"))
+        self.assertTrue(self.storage.exists("recipes/first.png"))
+
+        self.dedupe()
+        for recipe in (first, second, other):
+            recipe.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertEqual(first.image_variants, {})
+        for name in ("recipes/first.png", "recipes/second.png",
+                     "recipes/other.png", variant):
+            self.assertFalse(self.storage.exists(name), name)
+        for recipe in (first, other):
+            with recipe.image.open() as file:
+                self.assertIn(file.read(), (b"same", b"other"))
+        self.assertIn("Переименовано: 0", self.dedupe())
+
+    def test_delete_orphans_after_grace_period(self):
+        referenced = self.storage.save(
+            "recipes/used.png", ContentFile(b"used"))
+        self.create_recipe(referenced)
+        old = self.write("recipes/old.png", b"old", age=2 * DAY)
+        old_variant = self.write(
+            variant_name(old, "small", "webp"), b"small", age=2 * DAY)
+        fresh = self.write(
+            self.storage.save("recipes/fresh.png", ContentFile(b"fresh")),
+            b"fresh", age=2 * DAY)
+        # Повторное сохранение того же содержимого продлевает жизнь файла:
+        # ссылку на него может вот-вот записать другой запрос.
+        self.assertEqual(
+            self.storage.save("recipes/again.png", ContentFile(b"fresh")),
+            fresh)
+
+        self.assertIn("файлов без ссылок: 1", self.dedupe("--dry-run"))
+        self.dedupe("--delete-orphans")
+        self.assertFalse(self.storage.exists(old))
+        self.assertFalse(self.storage.exists(old_variant))
+        self.assertTrue(self.storage.exists(fresh))
+        self.assertTrue(self.storage.exists(referenced))
+
+        self.dedupe("--delete-orphans", f"--orphan-age={DAY // 2}")
+        self.assertTrue(self.storage.exists(fresh))
+        self.dedupe("--delete-orphans", "--orphan-age=0")
+        self.assertFalse(self.storage.exists(fresh))
+        self.assertTrue(self.storage.exists(referenced))
+
+    def test_concurrent_save_of_same_content(self):
+        name = self.storage.save("recipes/first.png", ContentFile(b"same"))
+        saved = time.time() - DAY
+        os.utime(self.storage.path(name), (saved, saved))
+        # Второй запрос проверил exists() до того, как первый записал файл.
+        with mock.patch.object(self.storage, "exists", return_value=False):
+            self.assertEqual(
+                self.storage.save("recipes/second.png", ContentFile(b"same")),
+                name)
+        self.assertEqual(
+            self.storage.listdir("recipes")[1], [os.path.basename(name)])
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), saved)
@@ -0,0 +1,44 @@
+import os
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.exports import available_formats, canvas
+from users.models import User
+
+URL = "/api/recipes/download_shopping_cart/"
+
+
+class ShoppingListExportTests(TestCase):
+    """Выгрузка в PDF предлагается, только если шрифт загружается."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username="buyer", email="buyer@foodgram.ru")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SHOPPING_LIST_PDF_FONT="/nonexistent/font.ttf")
+    def test_pdf_without_font(self):
+        with self.assertLogs("api.exports", "WARNING"):
+            self.assertNotIn("pdf", available_formats())
+        response = self.client.get(URL, {"file_format": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("pdf", response.data["file_format"])
+        response = self.client.get(URL, {"file_format": "txt"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_pdf_with_font(self):
+        if canvas is None or not os.path.exists(
+                settings.SHOPPING_LIST_PDF_FONT):
+            self.skipTest("reportlab или шрифт PDF не установлены")
+        self.assertIn("pdf", available_formats())
+        response = self.client.get(URL, {"file_format": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            b"".join(response.streaming_content).startswith(b"%PDF"))
@@ -0,0 +1,24 @@
+from api.filters import RecipeFilter
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+
+
+class RecipeFilterTests(FoodgramTestCase):
+    """Фильтры списка рецептов."""
+
+    def filtered_queryset(self, url):
+        request = self.anon.get(url).wsgi_request
+        return RecipeFilter(request.GET, Recipe.objects.all(),
+                            request=request).qs
+
+    def test_recipes_tags_without_duplicates(self):
+        slugs = [tag.slug for tag in self.tags]
+        url = "/api/recipes/?" + "&".join(f"tags={slug}" for slug in slugs)
+        response = self.anon.get(f"{url}&limit={len(self.recipes)}")
+        ids = [recipe["id"] for recipe in response.data["results"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(
+            response.data["count"],
+            Recipe.objects.filter(tags__slug__in=slugs).distinct().count())
+        self.assertNotIn("DISTINCT", str(
+            self.filtered_queryset(url).query))
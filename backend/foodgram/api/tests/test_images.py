@@ -0,0 +1,71 @@
+import base64
+import json
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+
+from api.tests.base import IMAGE, FoodgramTestCase
+from recipes.models import Recipe
+
+
+class RecipeImageTests(FoodgramTestCase):
+    """Загрузка картинок рецептов, их копии и хранение по хэшу."""
+
+    def test_recipe_image_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.auth.post(
+                "/api/recipes/", self.recipe_payload(), format="json")
+        self.assertEqual(response.data["image_variants"], {})
+        variants = self.anon.get(
+            f"/api/recipes/{response.data['id']}/").data["image_variants"]
+        self.assertEqual(set(variants), {"small", "medium"})
+        for urls in variants.values():
+            self.assertEqual(set(urls), {"png", "webp"})
+            self.assertTrue(urls["webp"].startswith("http://testserver/"))
+
+    def test_recipe_image_upload(self):
+        payload = self.recipe_payload()
+        image = base64.b64decode(IMAGE.partition(";base64,")[2])
+        response = self.auth.post("/api/recipes/", {
+            **payload,
+            "ingredients": json.dumps(payload["ingredients"]),
+            "image": SimpleUploadedFile("photo.bin", image),
+        }, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["image"].endswith(".png"))
+        with override_settings(RECIPE_IMAGE_MAX_SIZE=len(image) - 1):
+            for data, format in (
+                (payload, "json"),
+                ({**payload,
+                  "ingredients": json.dumps(payload["ingredients"]),
+                  "image": SimpleUploadedFile("photo.png", image)},
+                 "multipart"),
+            ):
+                response = self.auth.post(
+                    "/api/recipes/", data, format=format)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("image", response.data)
+        response = self.auth.post("/api/recipes/", {
+            **payload, "image": "data:image/png;base64,bm90IGFuIGltYWdl"},
+            format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipe_image_deduplicated(self):
+        names = []
+        for _ in range(2):
+            response = self.auth.post(
+                "/api/recipes/", self.recipe_payload(), format="json")
+            names.append(Recipe.objects.get(id=response.data["id"]).image)
+        self.assertEqual(names[0].name, names[1].name)
+        storage = names[0].storage
+        for image in names:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.auth.delete(f"/api/recipes/{image.instance.id}/")
+            self.assertTrue(storage.exists(image.name))
+        call_command("dedupe_media", "--delete-orphans", "--orphan-age=0",
+                     stdout=StringIO())
+        self.assertFalse(storage.exists(names[0].name))
@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_reference_version, reference_version_key
+from recipes.management.commands import load_ingr
+from recipes.models import Ingredient
+
+ROWS = [
+    ("абрикосовое варенье", "г"),
+    ("Молоко", "мл"),
+    ("Молоко", "г"),
+    ("соль", "по вкусу"),
+]
+
+
+class LoadIngredientsTests(TestCase):
+    """Загрузка справочника ингредиентов командой load_ingr."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, filename, content):
+        path = os.path.join(self.directory, filename)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def write_csv(self, rows):
+        lines = ["name,measurement_unit"] + [
+            f'"{name}",{unit}' for name, unit in rows]
+        return self.write("ingredients.csv", "\n".join(lines) + "\n")
+
+    def write_json(self, rows):
+        return self.write("ingredients.json", json.dumps(
+            [{"name": name, "measurement_unit": unit} for name, unit in rows],
+            ensure_ascii=False, indent=2))
+
+    def load(self, path, *args):
+        output = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("load_ingr", path, *args, stdout=output)
+        return output.getvalue()
+
+    def assertRerunInsertsNothing(self, path):
+        with CaptureQueriesContext(connection) as context:
+            output = self.load(path)
+        self.assertIn("добавлено: 0, уже было: 4", output)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if query["sql"].startswith("INSERT")])
+
+    def assertLoaded(self, rows):
+        self.assertEqual(
+            set(Ingredient.objects.values_list("name", "measurement_unit")),
+            set(rows))
+
+    def test_csv(self):
+        path = self.write_csv(ROWS + [(" соль ", "по вкусу"), ("", "г")])
+        output = self.load(path, "--chunk-size=2")
+        self.assertIn("Прочитано строк: 6, добавлено: 4, уже было: 0", output)
+        self.assertLoaded(ROWS)
+
+        self.assertRerunInsertsNothing(path)
+        self.assertLoaded(ROWS)
+
+    def test_json(self):
+        path = self.write_json(ROWS)
+        # Маленькие порции чтения: элементы массива разрезаются между ними.
+        with mock.patch.object(load_ingr, "READ_SIZE", 16):
+            output = self.load(path)
+        self.assertIn("Прочитано строк: 4, добавлено: 4", output)
+        self.assertLoaded(ROWS)
+
+        self.assertRerunInsertsNothing(path)
+        self.assertLoaded(ROWS)
+
+    def test_new_rows_change_reference_version(self):
+        version = get_reference_version(Ingredient)
+        self.load(self.write_csv(ROWS[:2]))
+        loaded = get_reference_version(Ingredient)
+        self.assertNotEqual(loaded, version)
+        self.load(self.write_json(ROWS[:2]))
+        self.assertEqual(get_reference_version(Ingredient), loaded)
+        self.load(self.write_json(ROWS))
+        self.assertNotEqual(get_reference_version(Ingredient), loaded)
+        self.assertLoaded(ROWS)
+
+    def test_version_seen_by_other_processes(self):
+        # Общий кэш в файлах: отдельное подключение к нему видит то же,
+        # что видел бы воркер в другом процессе.
+        location = os.path.join(self.directory, "cache")
+        backend = "django.core.cache.backends.filebased.FileBasedCache"
+        with override_settings(CACHES={
+            "default": {"BACKEND": backend, "LOCATION": location},
+        }):
+            worker_cache = caches.create_connection("default")
+            key = reference_version_key(Ingredient)
+            version = get_reference_version(Ingredient)
+            self.assertEqual(worker_cache.get(key), version)
+            output = self.load(self.write_csv(ROWS))
+            self.assertNotIn("Кэш не общий", output)
+            self.assertNotEqual(worker_cache.get(key), version)
+
+        output = self.load(self.write_csv(ROWS + [("Перец", "г")]))
+        self.assertIn("Кэш не общий для процессов", output)
+
+    def test_invalid_files(self):
+        with self.assertRaisesMessage(CommandError, ".csv и .json"):
+            call_command("load_ingr", self.write("ingredients.txt", ""))
+        with self.assertRaisesMessage(CommandError, "не найден"):
+            call_command(
+                "load_ingr", os.path.join(self.directory, "missing.csv"))
+        with self.assertRaisesMessage(ValueError, "JSON-массив"):
+            call_command("load_ingr", self.write("ingredients.json", "{}"))
@@ -0,0 +1,34 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.ndjson import RecipeImporter, export_lines
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+
+
+class RecipeNdjsonTests(FoodgramTestCase):
+    """Выгрузка и загрузка рецептов в формате NDJSON."""
+
+    def test_recipes_ndjson(self):
+        with CaptureQueriesContext(connection) as context:
+            lines = list(export_lines(Recipe.objects.all(), chunk_size=10))
+        self.assertEqual(len(lines), len(self.recipes))
+        self.assertEqual(len(context.captured_queries), 1 + 2 * 3)
+        broken = json.loads(lines[0])
+        broken["tags"] = ["missing"]
+        lines += ["{", json.dumps(broken, ensure_ascii=False) + "\n"]
+        importer = RecipeImporter(batch_size=10).run(lines)
+        self.assertEqual(importer.created, len(self.recipes))
+        self.assertEqual(
+            [number for number, _ in importer.errors],
+            [len(lines) - 1, len(lines)])
+        copy = Recipe.objects.order_by("-id").first()
+        original = Recipe.objects.get(
+            author=copy.author, name=copy.name, id__lt=copy.id)
+        for field in ("ingredient_id", "amount"):
+            self.assertCountEqual(
+                copy.recipe_ingredients.values_list(field, flat=True),
+                original.recipe_ingredients.values_list(field, flat=True))
+        self.assertCountEqual(copy.tags.all(), original.tags.all())
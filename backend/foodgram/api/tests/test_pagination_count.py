@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+
+
+class PaginationCountTests(FoodgramTestCase):
+    """Поле count в постраничном выводе рецептов."""
+
+    def test_recipes_list_count(self):
+        with CaptureQueriesContext(connection) as context:
+            first = self.auth.get("/api/recipes/?is_favorited=0")
+            second = self.auth.get("/api/recipes/?is_favorited=0&page=2")
+        self.assertEqual(first.data["count"], second.data["count"])
+        self.assertEqual(
+            sum("COUNT(*)" in query["sql"]
+                for query in context.captured_queries), 1)
+        response = self.anon.get(
+            f"/api/recipes/?count=0&limit={len(self.recipes) - 1}")
+        self.assertIsNone(response.data["count"])
+        self.assertIsNotNone(response.data["next"])
+        self.assertEqual(self.anon.get(response.data["next"]).data["next"],
+                         None)
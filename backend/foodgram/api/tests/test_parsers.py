@@ -0,0 +1,47 @@
+import json
+from io import BytesIO
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.parsers import RecipeJSONParser, RequestTooLarge
+from users.models import User
+
+
+@override_settings(RECIPE_REQUEST_MAX_SIZE=100)
+class RecipeParserTests(TestCase):
+    """Размер тела запроса рецепта ограничен RECIPE_REQUEST_MAX_SIZE."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username="author", email="author@foodgram.ru")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_json_too_large(self):
+        response = self.client.post(
+            "/api/recipes/", {"name": "x" * 100}, format="json")
+        self.assertEqual(
+            response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_multipart_too_large(self):
+        response = self.client.post(
+            "/api/recipes/", {"name": "x" * 100}, format="multipart")
+        self.assertEqual(
+            response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_json_read_is_bounded(self):
+        request = APIRequestFactory().post("/api/recipes/")
+        request.META.pop("CONTENT_LENGTH", None)
+        parser = RecipeJSONParser()
+        context = {"request": request}
+        body = json.dumps({"name": "x" * 80}).encode()
+        self.assertEqual(
+            parser.parse(BytesIO(body), parser_context=context),
+            {"name": "x" * 80})
+        with self.assertRaises(RequestTooLarge):
+            parser.parse(BytesIO(body + b" " * 20), parser_context=context)
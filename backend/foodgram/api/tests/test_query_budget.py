@@ -0,0 +1,187 @@
+import os
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.authentication import local_tokens
+from api.exports import available_formats
+from api.tests.base import FoodgramTestCase
+from recipes.models import RecipeIngredient
+
+MAX_SECONDS = float(os.getenv("QUERY_BUDGET_MAX_SECONDS", 0.5))
+
+SMALL_PAGE = 2
+LARGE_PAGE = 12
+
+
+class QueryBudgetTests(FoodgramTestCase):
+    """Бюджет SQL-запросов и времени ответа для каждого эндпоинта API."""
+
+    def assertBudget(self, client, method, url, max_queries,
+                     expected_status=status.HTTP_200_OK, data=None):
+        """Выполняет запрос и проверяет число SQL-запросов и время."""
+        cache.clear()
+        local_tokens.clear()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(
+            response.status_code, expected_status,
+            f"{method.upper()} {url}: {getattr(response, 'data', '')}")
+        queries = "\n".join(
+            query["sql"] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), max_queries,
+            f"{method.upper()} {url}: {len(context)} запросов "
+            f"при бюджете {max_queries}\n{queries}")
+        self.assertLess(
+            elapsed, MAX_SECONDS,
+            f"{method.upper()} {url}: {elapsed:.3f} c "
+            f"при бюджете {MAX_SECONDS} c")
+        return len(context)
+
+    def assertPageIndependent(self, client, url, max_queries):
+        """Проверяет, что число запросов не зависит от размера страницы."""
+        separator = "&" if "?" in url else "?"
+        small = self.assertBudget(
+            client, "get", f"{url}{separator}limit={SMALL_PAGE}",
+            max_queries)
+        large = self.assertBudget(
+            client, "get", f"{url}{separator}limit={LARGE_PAGE}",
+            max_queries)
+        self.assertEqual(
+            small, large,
+            f"{url}: {small} запросов при limit={SMALL_PAGE}, "
+            f"{large} при limit={LARGE_PAGE}")
+
+    def test_recipes_list(self):
+        self.assertPageIndependent(self.anon, "/api/recipes/", 5)
+        self.assertPageIndependent(self.auth, "/api/recipes/", 6)
+
+    def test_recipes_list_without_count(self):
+        self.assertBudget(self.anon, "get", "/api/recipes/?count=0", 4)
+
+    def test_recipes_list_filtered(self):
+        self.assertPageIndependent(
+            self.anon, f"/api/recipes/?tags={self.tags[0].slug}", 5)
+        self.assertPageIndependent(
+            self.auth,
+            f"/api/recipes/?is_favorited=1&tags={self.tags[0].slug}", 6)
+        self.assertPageIndependent(
+            self.auth, "/api/recipes/?is_in_shopping_cart=1", 6)
+        self.assertPageIndependent(
+            self.auth, f"/api/recipes/?author={self.authors[1].id}", 7)
+
+    def test_users_cursor_page(self):
+        self.assertPageIndependent(self.anon, "/api/users/?cursor=", 1)
+        self.assertBudget(
+            self.auth, "get", "/api/users/subscriptions/?cursor=", 3)
+
+    def test_recipe_detail(self):
+        url = f"/api/recipes/{self.recipes[0].id}/"
+        self.assertBudget(self.anon, "get", url, 4)
+        self.assertBudget(self.auth, "get", url, 5)
+
+    def test_recipe_create(self):
+        self.assertBudget(
+            self.anon, "post", "/api/recipes/", 0,
+            status.HTTP_401_UNAUTHORIZED, self.recipe_payload())
+        self.assertBudget(
+            self.auth, "post", "/api/recipes/", 25,
+            status.HTTP_201_CREATED, self.recipe_payload())
+
+    def test_recipe_patch(self):
+        recipe = self.authors[0].recipes.first()
+        url = f"/api/recipes/{recipe.id}/"
+        self.assertBudget(
+            self.anon, "patch", url, 0,
+            status.HTTP_401_UNAUTHORIZED, self.recipe_payload())
+        self.assertBudget(
+            self.author, "patch", url, 36,
+            status.HTTP_200_OK, self.recipe_payload())
+
+    def test_favorite(self):
+        recipe = self.recipes[1]
+        url = f"/api/recipes/{recipe.id}/favorite/"
+        self.assertBudget(
+            self.anon, "post", url, 0, status.HTTP_401_UNAUTHORIZED)
+        self.assertBudget(self.auth, "post", url, 7, status.HTTP_201_CREATED)
+        self.assertBudget(
+            self.auth, "delete", url, 7, status.HTTP_204_NO_CONTENT)
+
+    def test_shopping_cart(self):
+        recipe = self.recipes[1]
+        url = f"/api/recipes/{recipe.id}/shopping_cart/"
+        self.assertBudget(
+            self.anon, "post", url, 0, status.HTTP_401_UNAUTHORIZED)
+        self.assertBudget(self.auth, "post", url, 10, status.HTTP_201_CREATED)
+        self.assertBudget(
+            self.auth, "delete", url, 10, status.HTTP_204_NO_CONTENT)
+
+    def test_download_shopping_cart(self):
+        url = "/api/recipes/download_shopping_cart/"
+        self.assertBudget(
+            self.anon, "get", url, 0, status.HTTP_401_UNAUTHORIZED)
+        for file_format in available_formats():
+            self.assertBudget(
+                self.auth, "get", f"{url}?file_format={file_format}", 2)
+        response = self.auth.get(f"{url}?file_format=csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            len(lines) - 1,
+            RecipeIngredient.objects.filter(
+                recipe__shopping_lists__user=self.user
+            ).values("ingredient").distinct().count())
+
+    def test_users(self):
+        self.assertBudget(self.anon, "get", "/api/users/", 2)
+        self.assertPageIndependent(self.auth, "/api/users/", 4)
+        url = f"/api/users/{self.authors[0].id}/"
+        self.assertBudget(self.anon, "get", url, 1)
+        self.assertBudget(self.auth, "get", url, 3)
+        self.assertBudget(self.auth, "get", "/api/users/me/", 2)
+
+    def test_subscriptions(self):
+        self.assertBudget(
+            self.anon, "get", "/api/users/subscriptions/", 0,
+            status.HTTP_401_UNAUTHORIZED)
+        self.assertBudget(
+            self.auth, "get", "/api/users/subscriptions/", 4)
+
+    def test_subscriptions_page_independent(self):
+        self.assertPageIndependent(
+            self.auth, "/api/users/subscriptions/", 5)
+
+    def test_subscriptions_recipes_limit(self):
+        self.assertPageIndependent(
+            self.auth, "/api/users/subscriptions/?recipes_limit=1", 4)
+
+    def test_subscribe(self):
+        url = f"/api/users/{self.authors[0].id}/subscribe/"
+        self.assertBudget(
+            self.anon, "post", url, 0, status.HTTP_401_UNAUTHORIZED)
+        self.assertBudget(
+            self.auth, "post", url, 12, status.HTTP_201_CREATED)
+        self.assertBudget(
+            self.auth, "delete", url, 6, status.HTTP_204_NO_CONTENT)
+
+    def test_tags(self):
+        for client, queries in ((self.anon, 1), (self.auth, 2)):
+            self.assertBudget(client, "get", "/api/tags/", queries)
+            self.assertBudget(
+                client, "get", f"/api/tags/{self.tags[0].id}/", queries)
+
+    def test_ingredients(self):
+        for client, queries in ((self.anon, 1), (self.auth, 2)):
+            self.assertBudget(client, "get", "/api/ingredients/", queries)
+            self.assertBudget(
+                client, "get", "/api/ingredients/?name=Ингр", queries)
+            self.assertBudget(
+                client, "get",
+                f"/api/ingredients/{self.ingredients[0].id}/", queries)
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe, RecipeIngredient
+
+
+class RecipePatchTests(FoodgramTestCase):
+    """PATCH рецепта меняет только изменившиеся ингредиенты и тэги."""
+
+    def recipe_writes(self, url, payload):
+        """Изменяющие запросы к таблицам ингредиентов и тэгов рецепта."""
+        tables = (RecipeIngredient._meta.db_table,
+                  Recipe.tags.through._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            response = self.author.patch(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+            and any(f'"{table}"' in query["sql"] for table in tables)
+        ]
+
+    def test_recipe_patch_diff(self):
+        recipe = self.authors[0].recipes.first()
+        url = f"/api/recipes/{recipe.id}/"
+        payload = self.recipe_payload()
+        self.author.patch(url, payload, format="json")
+        self.assertEqual(self.recipe_writes(url, payload), [])
+        payload["ingredients"][0]["amount"] = 25
+        writes = self.recipe_writes(url, payload)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith("UPDATE"))
+        self.assertEqual(
+            dict(recipe.recipe_ingredients.values_list(
+                "ingredient_id", "amount")),
+            {item["id"]: item["amount"] for item in payload["ingredients"]})
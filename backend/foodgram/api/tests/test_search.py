@@ -0,0 +1,125 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from api.search import (TRIGRAM_MIN_LENGTH, IngredientIndex,
+                        search_ingredients)
+from api.tests.base import INGREDIENTS_COUNT, FoodgramTestCase
+from recipes.models import Ingredient
+
+NAMES = (
+    "Молоко",
+    "Сгущённое молоко",
+    "Молоко козье",
+    "Кокосовое МОЛОКО",
+    "Молочный шоколад",
+    "Мука",
+    "Соль",
+)
+
+
+def names(query):
+    return [entry["name"] for entry in search_ingredients(query)]
+
+
+@override_settings(INGREDIENT_SEARCH_MODE="database")
+class DatabaseSearchTests(TestCase):
+    """Поиск ингредиентов при INGREDIENT_SEARCH_MODE="database"."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г") for name in NAMES)
+
+    def test_prefix_before_substring(self):
+        self.assertEqual(names("молоко"), [
+            "Молоко",
+            "Молоко козье",
+            "Кокосовое МОЛОКО",
+            "Сгущённое молоко",
+        ])
+
+    def test_cyrillic_case_insensitive(self):
+        for query in ("МОЛОКО", "мОлОкО", "  Молоко "):
+            with self.subTest(query=query):
+                self.assertEqual(names(query)[:2], ["Молоко", "Молоко козье"])
+        self.assertEqual(names("МУК"), ["Мука"])
+
+    def test_short_query_matches_prefix_only(self):
+        # Подстрока ищется начиная с TRIGRAM_MIN_LENGTH символов.
+        self.assertEqual(len("ко"), TRIGRAM_MIN_LENGTH - 1)
+        self.assertEqual(names("ко"), ["Кокосовое МОЛОКО"])
+        self.assertEqual(names("мол"), [
+            "Молоко",
+            "Молоко козье",
+            "Молочный шоколад",
+            "Кокосовое МОЛОКО",
+            "Сгущённое молоко",
+        ])
+        # На Postgres длинный запрос находит и похожие по триграммам
+        # названия (похожесть «шоколадка» и «молочный шоколад» 0.35).
+        expected = (
+            ["Молочный шоколад"] if connection.vendor == "postgresql"
+            else [])
+        self.assertEqual(names("шоколадка"), expected)
+
+    def test_typos_on_postgres(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("опечатки ищутся по триграммам pg_trgm")
+        for query in ("малоко", "молако", "молоко казье"):
+            with self.subTest(query=query):
+                self.assertIn("Молоко", names(query))
+        self.assertEqual(names("малоко")[0], "Молоко")
+        self.assertNotIn("Соль", names("малоко"))
+
+    def test_fallback_without_postgres(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("запасной поиск используется вне Postgres")
+        with self.assertNumQueries(1):
+            self.assertEqual(names("соль"), ["Соль"])
+        self.assertEqual(
+            search_ingredients("соль"),
+            [{"id": Ingredient.objects.get(name="Соль").id, "name": "Соль",
+              "measurement_unit": "г"}])
+
+
+class IngredientIndexTests(TestCase):
+    """Префиксный индекс в памяти процесса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г") for name in NAMES)
+
+    def test_rebuilt_after_write_elsewhere(self):
+        index = IngredientIndex()
+        self.assertEqual(len(index.search("мол")), 3)
+        # Запись другого процесса: bulk_create без сигналов не меняет
+        # версию справочника в кэше этого процесса.
+        Ingredient.objects.bulk_create([
+            Ingredient(name="Молотый перец", measurement_unit="г"),
+            Ingredient(name="Молоки", measurement_unit="г"),
+        ])
+        self.assertEqual(len(index.search("мол")), 3)
+        expired = time.time() + settings.CACHE_VERSION_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time",
+                        return_value=expired):
+            self.assertEqual(len(index.search("мол")), 5)
+
+
+@override_settings(INGREDIENT_SEARCH_MODE="memory")
+class IngredientSearchApiTests(FoodgramTestCase):
+    """Поиск ингредиентов через API по индексу в памяти."""
+
+    def test_ingredient_prefix_index(self):
+        response = self.anon.get("/api/ingredients/?name=ингр")
+        self.assertEqual(len(response.json()), INGREDIENTS_COUNT)
+        names = [
+            ingredient["name"] for ingredient in
+            self.anon.get("/api/ingredients/?name=ИНГРЕДИЕНТ 1").json()
+        ]
+        self.assertEqual(names[0], "Ингредиент 1")
+        self.assertEqual(len(names), 11)
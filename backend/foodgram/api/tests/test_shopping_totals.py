@@ -0,0 +1,174 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.base import FoodgramTestCase, admin_form_data
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingList, ShoppingListTotal)
+from recipes.totals import expected_totals, rebuild_totals
+from users.models import User
+
+
+class ShoppingTotalsTests(TestCase):
+    """Итоги списков покупок, когда один рецепт лежит у нескольких
+    пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username="author", email="author@foodgram.ru")
+        cls.users = [
+            User.objects.create(
+                username=f"buyer{i}", email=f"buyer{i}@foodgram.ru")
+            for i in range(3)
+        ]
+        cls.flour, cls.milk = (
+            Ingredient.objects.create(name=name, measurement_unit="г")
+            for name in ("Мука", "Молоко")
+        )
+        cls.pancakes, cls.bread = (
+            Recipe.objects.create(
+                author=author, name=name, image="recipes/totals.png",
+                text="Описание", cooking_time=10)
+            for name in ("Блины", "Хлеб")
+        )
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=cls.pancakes, ingredient=cls.flour, amount=5),
+            RecipeIngredient(
+                recipe=cls.pancakes, ingredient=cls.milk, amount=3),
+            RecipeIngredient(recipe=cls.bread, ingredient=cls.flour, amount=7),
+        ])
+        ShoppingList.objects.bulk_create(
+            [ShoppingList(user=user, recipe=cls.pancakes)
+             for user in cls.users]
+            + [ShoppingList(user=cls.users[0], recipe=cls.bread)]
+        )
+        cls.expected = {
+            (cls.users[0].id, cls.flour.id): 12,
+            (cls.users[0].id, cls.milk.id): 3,
+            (cls.users[1].id, cls.flour.id): 5,
+            (cls.users[1].id, cls.milk.id): 3,
+            (cls.users[2].id, cls.flour.id): 5,
+            (cls.users[2].id, cls.milk.id): 3,
+        }
+
+    def stored_totals(self):
+        return {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount
+            in ShoppingListTotal.objects.values_list(
+                "user_id", "ingredient_id", "amount")
+        }
+
+    def rebuild(self, *args):
+        output = StringIO()
+        call_command("rebuild_shopping_totals", *args, stdout=output)
+        return output.getvalue()
+
+    def test_expected_totals_for_shared_recipe(self):
+        for user_ids in (None, [user.id for user in self.users[:2]]):
+            expected = {
+                key: total for key, total in self.expected.items()
+                if user_ids is None or key[0] in user_ids
+            }
+            self.assertEqual(
+                {(user_id, ingredient_id): total
+                 for user_id, ingredient_id, total
+                 in expected_totals(user_ids)},
+                expected)
+
+    def test_rebuild_totals(self):
+        rebuild_totals([self.users[0].id])
+        rebuild_totals([user.id for user in self.users[1:]])
+        self.assertEqual(self.stored_totals(), self.expected)
+
+    def test_rebuild_shopping_totals_command(self):
+        rebuild_totals()
+        self.assertIn("Расхождений нет", self.rebuild("--verify"))
+        self.assertEqual(self.stored_totals(), self.expected)
+
+        ShoppingListTotal.objects.filter(
+            user=self.users[1], ingredient=self.flour).update(amount=50)
+        self.assertIn("разошлись у пользователей: 1", self.rebuild("--verify"))
+        self.assertIn("пересчитаны у пользователей: 1", self.rebuild())
+        self.assertEqual(self.stored_totals(), self.expected)
+        self.assertIn("Расхождений нет", self.rebuild("--verify"))
+
+
+class ShoppingTotalsApiTests(FoodgramTestCase):
+    """Итоги списков покупок поддерживаются при записи через API
+    и админку."""
+
+    def assertTotalsConsistent(self):
+        expected = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in expected_totals()
+        }
+        actual = dict(
+            ((user_id, ingredient_id), amount)
+            for user_id, ingredient_id, amount
+            in ShoppingListTotal.objects.values_list(
+                "user_id", "ingredient_id", "amount")
+        )
+        self.assertEqual(actual, expected)
+
+    def test_shopping_totals(self):
+        self.assertTotalsConsistent()
+        recipe = self.authors[0].recipes.first()
+        self.author.post(f"/api/recipes/{recipe.id}/shopping_cart/")
+        self.auth.post(f"/api/recipes/{recipe.id}/shopping_cart/")
+        self.assertTotalsConsistent()
+        self.author.patch(
+            f"/api/recipes/{recipe.id}/", self.recipe_payload(),
+            format="json")
+        self.assertTotalsConsistent()
+        self.auth.delete(f"/api/recipes/{recipe.id}/shopping_cart/")
+        self.assertTotalsConsistent()
+        self.author.delete(f"/api/recipes/{recipe.id}/")
+        self.assertTotalsConsistent()
+
+    def test_admin_writes(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@foodgram.ru", password="pass")
+        self.client.force_login(admin)
+        recipe = self.recipes[0]
+        self.author.post(f"/api/recipes/{recipe.id}/shopping_cart/")
+        self.assertTotalsConsistent()
+
+        url = f"/admin/recipes/recipe/{recipe.id}/change/"
+        data = admin_form_data(self.client.get(url))
+        unused = Ingredient.objects.exclude(recipe_ingredients__recipe=recipe)
+        data["recipe_ingredients-0-amount"] = "77"
+        data["recipe_ingredients-1-ingredient"] = str(unused.first().id)
+        data["recipe_ingredients-2-DELETE"] = "on"
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(77, recipe.recipe_ingredients.values_list(
+            "amount", flat=True))
+        self.assertTotalsConsistent()
+
+        cart_ids = list(ShoppingList.objects.filter(
+            user=self.user).values_list("id", flat=True)[:3])
+        ingredient_id = ShoppingListTotal.objects.filter(
+            user=self.user).first().ingredient_id
+        author_id = self.recipes[2].author_id
+        deletions = (
+            (f"/admin/recipes/recipe/{recipe.id}/delete/", {},
+             Recipe.objects.filter(id=recipe.id)),
+            ("/admin/recipes/shoppinglist/", {
+                "action": "delete_selected",
+                "_selected_action": cart_ids,
+            }, ShoppingList.objects.filter(id__in=cart_ids)),
+            (f"/admin/recipes/ingredient/{ingredient_id}/delete/", {},
+             Ingredient.objects.filter(id=ingredient_id)),
+            (f"/admin/users/user/{author_id}/delete/", {},
+             User.objects.filter(id=author_id)),
+        )
+        for url, data, deleted in deletions:
+            with self.subTest(url=url):
+                response = self.client.post(url, {**data, "post": "yes"})
+                self.assertEqual(response.status_code, 302)
+                self.assertFalse(deleted.exists())
+                self.assertTotalsConsistent()
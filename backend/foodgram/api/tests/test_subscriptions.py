@@ -0,0 +1,20 @@
+from api.tests.base import RECIPES_PER_AUTHOR, FoodgramTestCase
+from recipes.models import Recipe
+
+
+class SubscriptionRecipesTests(FoodgramTestCase):
+    """Рецепты авторов в подписках с параметром recipes_limit."""
+
+    def test_subscriptions_recipes_limit(self):
+        url = "/api/users/subscriptions/?recipes_limit=1"
+        for author in self.auth.get(url).data["results"]:
+            latest = Recipe.objects.filter(author_id=author["id"]).order_by(
+                "-pub_date", "-id").first()
+            self.assertEqual(
+                [recipe["id"] for recipe in author["recipes"]], [latest.id])
+            self.assertEqual(author["recipes_count"], RECIPES_PER_AUTHOR)
+            self.assertTrue(author["is_subscribed"])
+        response = self.auth.post(
+            f"/api/users/{self.authors[0].id}/subscribe/?recipes_limit=0")
+        self.assertEqual(response.data["recipes"], [])
+        self.assertEqual(response.data["recipes_count"], RECIPES_PER_AUTHOR)
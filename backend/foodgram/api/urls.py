@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_read_urls
 from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
 
 app_name = "api"
@@ -11,12 +13,18 @@ router.register(r"ingredients", IngredientViewSet, basename="ingredients")
 router.register(r"users", UserViewSet, basename="users")
 router.register(r"recipes", RecipeViewSet, basename="recipes")
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_urls(router_urls)
+
 
 urlpatterns = [
-    path("users/subscriptions/", UserViewSet.as_view({"get": "subscriptions"}),
+    path("users/subscriptions/",
+         UserViewSet.as_view({"get": "subscriptions"},
+                             **UserViewSet.subscriptions.kwargs),
          name="user-subscriptions"),
     path("", include("djoser.urls")),
     re_path(r"^auth/", include("djoser.urls.authtoken")),
-    path("", include(router.urls)),
+    path("", include(router_urls)),
 
 ]
@@ -1,8 +1,10 @@
-from collections import defaultdict
-
-from django.db.models import Sum
-from django.db.models.functions import Coalesce
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value, Window, prefetch_related_objects)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -10,13 +12,18 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingList, Tag)
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingList, Tag
 from users.models import Subscription, User
+from .cache import (RECIPE_CACHE_TIMEOUT, merge_user_flags, recipe_detail_key,
+                    split_user_flags)
+from .db_router import use_primary
+from .exports import EXPORT_FORMATS, available_formats, shopping_list_rows
 from .filters import IngredientSearch, RecipeFilter
 from .mixins import SimpleViewSet
-from .pagination import FoodgramPagination
+from .pagination import FoodgramCountPagination, FoodgramPagination
+from .parsers import RecipeJSONParser, RecipeMultiPartParser
 from .permissions import IsAuthorOrReadOnly
+from .search import search_ingredients
 from .serializers import (CreateRecipeSerializer, FavorShopRecipeSerializer,
                           IngredientSerializer, ReadRecipeSerializer,
                           SubscriptionSerializer, TagSerializer,
@@ -30,8 +37,45 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = (AllowAny,)
     pagination_class = FoodgramPagination
 
+    recipes_limit_param = "recipes_limit"
+
+    def get_recipes_limit(self):
+        try:
+            limit = int(self.request.query_params[self.recipes_limit_param])
+        except (KeyError, ValueError):
+            return None
+        return max(limit, 0)
+
+    def prefetch_recipes(self, authors):
+        """Загружает рецепты авторов одним запросом.
+
+        При recipes_limit рецепты нумеруются оконной функцией ROW_NUMBER()
+        отдельно для каждого автора, и в выборку попадают только первые
+        recipes_limit, сколько бы рецептов у автора ни было.
+        """
+        ordering = ("-pub_date", "-id")
+        recipes = Recipe.objects.order_by(*ordering)
+        limit = self.get_recipes_limit()
+        if limit is not None:
+            ranked = Recipe.objects.filter(author__in=authors).annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F("author_id"),
+                    order_by=[F(field.lstrip("-")).desc()
+                              for field in ordering],
+                ),
+            ).order_by().values("id", "row_number")
+            sql, params = ranked.query.sql_with_params()
+            recipes = recipes.filter(id__in=RawSQL(
+                f"SELECT ranked.id FROM ({sql}) ranked "
+                f"WHERE ranked.row_number <= %s",
+                (*params, limit),
+            ))
+        prefetch_related_objects(authors, Prefetch("recipes", recipes))
+
     def subscribed(self, request, pk):
         author = get_object_or_404(User, pk=pk)
+        self.prefetch_recipes([author])
         serializer = SubscriptionSerializer(
             author, context={"request": request})
         serializer.validate(serializer.data)
@@ -60,9 +104,15 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(following__user=request.user)
+        queryset = User.objects.filter(
+            following__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        )
         paginator = self.pagination_class()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        paginated_queryset = paginator.paginate_queryset(
+            queryset, request, view=self)
+        self.prefetch_recipes(paginated_queryset)
         serializer = SubscriptionSerializer(
             paginated_queryset, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -81,21 +131,77 @@ class IngredientViewSet(SimpleViewSet):
     filter_backends = (IngredientSearch,)
     search_fields = ("^name",)
 
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get(IngredientSearch.search_param)
+        if not query:
+            return super().list(request, *args, **kwargs)
+        return self.versioned_response(self.search, request, query)
+
+    def search(self, request, query):
+        return Response(search_ingredients(query))
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """Вьюсет для рецепта."""
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = FoodgramPagination
+    pagination_class = FoodgramCountPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    cursor_ordering = ("-pub_date", "-id")
+    parser_classes = (RecipeJSONParser, RecipeMultiPartParser)
     http_method_names = ["get", "post", "patch", "delete"]
 
+    def get_queryset(self):
+        return self.annotate_user_flags(
+            Recipe.objects.select_related("author").prefetch_related(
+                "tags", "recipe_ingredients__ingredient"
+            )
+        )
+
+    def annotate_user_flags(self, queryset):
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                is_author_subscribed=Value(False, output_field=BooleanField()),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef("pk"))),
+            is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                user=user, recipe=OuterRef("pk"))),
+            is_author_subscribed=Exists(Subscription.objects.filter(
+                user=user, author=OuterRef("author"))),
+        )
+
     def get_serializer_class(self):
         if self.request.method == "POST" or self.request.method == "PATCH":
             return CreateRecipeSerializer
         return ReadRecipeSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        key = recipe_detail_key(request, pk)
+        shared = cache.get(key)
+        if shared is None:
+            with use_primary():
+                response = super().retrieve(request, *args, **kwargs)
+            cache.set(key, split_user_flags(response.data),
+                      RECIPE_CACHE_TIMEOUT)
+            return response
+        if request.user.is_anonymous:
+            return Response(merge_user_flags(shared, False, False, False))
+        flags = self.annotate_user_flags(
+            Recipe.objects.filter(pk=pk)
+        ).values_list(
+            "is_favorited", "is_in_shopping_cart", "is_author_subscribed"
+        ).first()
+        if flags is None:
+            raise Http404
+        return Response(merge_user_flags(shared, *flags))
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -108,11 +214,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer = FavorShopRecipeSerializer(
                 recipe, context={"request": request})
             serializer.validate_favorited(serializer.data)
-            Favorite.objects.create(user=user, recipe=recipe)
+            with transaction.atomic():
+                Favorite.objects.create(user=user, recipe=recipe)
             return Response(data=serializer.data,
                             status=status.HTTP_201_CREATED)
-        deleted = get_object_or_404(Favorite, user=user, recipe=recipe)
-        deleted.delete()
+        get_object_or_404(Favorite, user=user, recipe=recipe).delete()
         return Response({"message": "Рецепт удален из избранного"},
                         status=status.HTTP_204_NO_CONTENT)
 
@@ -128,11 +234,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer = FavorShopRecipeSerializer(
                 recipe, context={"request": request})
             serializer.validate_shopping_cart(serializer.data)
-            ShoppingList.objects.create(user=user, recipe=recipe)
+            with transaction.atomic():
+                ShoppingList.objects.create(user=user, recipe=recipe)
             return Response(data=serializer.data,
                             status=status.HTTP_201_CREATED)
-        deleted = get_object_or_404(ShoppingList, user=user, recipe=recipe)
-        deleted.delete()
+        get_object_or_404(ShoppingList, user=user, recipe=recipe).delete()
         return Response({"message": "Рецепт удален из списка покупок"},
                         status=status.HTTP_204_NO_CONTENT)
 
@@ -142,28 +248,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        shopping_cart = request.user.shopping_lists.all()
-        ingredients_data = RecipeIngredient.objects.filter(
-            recipe__in=[item.recipe for item in shopping_cart]
-        ).values(
-            "ingredient__name",
-            "ingredient__measurement_unit"
-        ).annotate(
-            amount=Coalesce(Sum("amount"), 0)
-        )
-
-        final_list = defaultdict(lambda: {"measurement_unit": "", "amount": 0})
-        for item in ingredients_data:
-            ingredient_name = item["ingredient__name"]
-            measurement_unit = item["ingredient__measurement_unit"]
-            amount = item["amount"]
-            final_list[ingredient_name]["measurement_unit"] = measurement_unit
-            final_list[ingredient_name]["amount"] += amount
-
-        shopping_list = ["Список покупок", ""]
-        for key, value in final_list.items():
-            shopping_list.append(
-                f"{key} - {value['amount']} {value['measurement_unit']}")
-        shopping_list_text = "\n".join(shopping_list)
-        response = HttpResponse(shopping_list_text, content_type="text/plain")
+        file_format = request.query_params.get("file_format", "txt")
+        if file_format not in available_formats():
+            return Response(
+                {"file_format": "Доступные форматы: "
+                                f"{', '.join(available_formats())}."},
+                status=status.HTTP_400_BAD_REQUEST)
+        export, content_type = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            export(shopping_list_rows(request.user)),
+            content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_list.{file_format}"')
         return response
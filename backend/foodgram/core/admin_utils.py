@@ -0,0 +1,89 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .counts import estimated_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка админки без COUNT(*) по всей большой таблице.
+
+    Для списка без фильтров и поиска число записей берётся из
+    статистики планировщика Postgres, отфильтрованный список
+    считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None:
+            return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Фильтр по внешнему ключу с поиском через autocomplete админки.
+
+    В отличие от RelatedFieldListFilter не загружает все связанные
+    записи: в фильтре выводится только выбранная. У админки связанной
+    модели должны быть заданы search_fields.
+    """
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        remote = field.remote_field
+        self.lookup_kwarg = f"{field_path}__{remote.field_name}__exact"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(
+            field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=remote.model._default_manager.all(),
+            to_field_name=remote.field_name,
+            required=False,
+            widget=AutocompleteSelect(
+                field, model_admin.admin_site,
+                attrs={
+                    "class": "admin-autocomplete-filter",
+                    "data-lookup": self.lookup_kwarg,
+                    "data-width": "100%",
+                },
+            ),
+        )
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(
+                remove=[self.lookup_kwarg]),
+            "display": _("All"),
+        }
+
+    def rendered_widget(self):
+        return self.form_field.widget.render(
+            self.lookup_kwarg, self.lookup_val)
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """Админка большой таблицы: оценка числа записей вместо COUNT(*)
+    и статика для AutocompleteFilter."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = "-пусто-"
+
+    @property
+    def media(self):
+        return (
+            super().media
+            + AutocompleteSelect(None, self.admin_site).media
+            + forms.Media(js=["admin/js/autocomplete_filter.js"])
+        )
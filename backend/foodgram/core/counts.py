@@ -0,0 +1,29 @@
+from django.db import connections
+
+# Меньше этой оценки таблица считается точным COUNT(*).
+ESTIMATE_THRESHOLD = 100000
+
+
+def estimated_count(queryset):
+    """Оценка числа строк из статистики планировщика Postgres.
+
+    Возвращает None, если нужен точный COUNT(*): в запросе есть условия
+    или DISTINCT, база не Postgres или в таблице меньше
+    ESTIMATE_THRESHOLD строк.
+    """
+    connection = connections[queryset.db]
+    if (
+        connection.vendor != "postgresql"
+        or queryset.query.where
+        or queryset.query.distinct
+    ):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < ESTIMATE_THRESHOLD:
+        return None
+    return row[0]
@@ -0,0 +1,17 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Выбор значения в фильтре с автодополнением перезагружает список
+    // с новым параметром фильтра, начиная с первой страницы.
+    $(document).on('change', '.admin-autocomplete-filter', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.dataset.lookup, this.value);
+        } else {
+            params.delete(this.dataset.lookup);
+        }
+        window.location.search = params.toString();
+    });
+}
@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'django_filters',
     'rest_framework.authtoken',
     'djoser',
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,6 +72,86 @@ DATABASES = {
     }
 }
 
+for number, host in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        # В тестах реплика — та же тестовая база, что и основная.
+        "TEST": {"MIRROR": "default"},
+    }
+
+if os.getenv("DB_ENGINE", "postgresql") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        },
+        # Вторая база изображает реплику при локальной проверке
+        # маршрутизации чтений (DB_REPLICAS=replica). Она намеренно
+        # не зеркалирует основную: тесты маршрутизации отличают
+        # чтение из реплики по отсутствию в ней записей.
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "replica.sqlite3",
+        },
+    }
+
+DATABASE_ROUTERS = ["api.db_router.PrimaryReplicaRouter"]
+
+# Псевдонимы баз, из которых читают безопасные запросы к API. По
+# умолчанию это все реплики из DB_REPLICA_HOSTS.
+DATABASE_REPLICAS = list(filter(None, os.getenv(
+    "DB_REPLICAS",
+    ",".join(alias for alias in DATABASES if alias.startswith("replica_")),
+).split(",")))
+
+# Сколько секунд после записи клиент читает из основной базы. Отметка
+# о записи хранится в кэше, поэтому с репликами нужен общий для всех
+# процессов кэш (проверка api.W001).
+DATABASE_PRIMARY_STICKY_SECONDS = int(
+    os.getenv("DB_PRIMARY_STICKY_SECONDS", 10))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Сколько секунд живут версии рецептов и справочников в кэше. Версию
+# меняет процесс, сделавший запись; с кэшем в памяти процесса остальные
+# воркеры и manage.py-команды увидят запись не позже, чем через это время
+# (проверка api.W001).
+CACHE_VERSION_TIMEOUT = int(os.getenv("CACHE_VERSION_TIMEOUT", 60))
+
+# В ASGI-режиме (foodgram.asgi) чтение рецептов, тэгов, ингредиентов
+# и выгрузка списка покупок обслуживаются асинхронными view.
+ASYNC_READ_VIEWS = os.getenv("SERVER_MODE", "wsgi") == "asgi"
+
+INGREDIENT_SEARCH_MODE = os.getenv("INGREDIENT_SEARCH_MODE", "memory")
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+RECIPE_IMAGE_VARIANTS = {"small": 320, "medium": 960}
+RECIPE_IMAGE_WORKERS = int(os.getenv("RECIPE_IMAGE_WORKERS", 2))
+RECIPE_IMAGE_MAX_SIZE = int(os.getenv("RECIPE_IMAGE_MAX_SIZE", 10 * 2 ** 20))
+RECIPE_IMAGE_CHUNK_SIZE = 64 * 2 ** 10
+# Файл картинки без ссылок удаляется не раньше, чем через столько секунд
+# после последнего сохранения.
+RECIPE_IMAGE_ORPHAN_AGE = int(
+    os.getenv("RECIPE_IMAGE_ORPHAN_AGE", 24 * 60 * 60))
+# Тело запроса рецепта с картинкой в base64 на треть больше самой
+# картинки; более крупные запросы парсеры API отклоняют с кодом 413.
+RECIPE_REQUEST_MAX_SIZE = RECIPE_IMAGE_MAX_SIZE * 4 // 3 + 2 ** 20
+# Файлы из multipart крупнее этого размера пишутся во временный файл.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 4 * RECIPE_IMAGE_CHUNK_SIZE
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -91,14 +173,19 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
-    'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.FoodgramPagination',
     'PAGE_SIZE': 6,
 }
 
+# Токены кэшируются в памяти процесса на TOKEN_CACHE_LOCAL_TIMEOUT
+# секунд и в общем кэше на TOKEN_CACHE_TIMEOUT секунд.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.getenv("TOKEN_CACHE_LOCAL_TIMEOUT", 10))
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", 5 * 60))
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from core.admin_utils import AutocompleteFilter, ScalableModelAdmin
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                      ShoppingList, Tag)
 
@@ -11,47 +12,58 @@ class TagAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(ScalableModelAdmin):
     list_display = ("id", "name", "measurement_unit")
     search_fields = ("name",)
-    list_filter = ("name",)
-    empty_value_display = "-пусто-"
 
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
+    autocomplete_fields = ("ingredient",)
 
 
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("id", "author", "name", "favorites_count_display")
+class RecipeAdmin(ScalableModelAdmin):
+    list_display = ("id", "author", "name", "favorites_count_display",
+                    "in_carts_count")
+    list_select_related = ("author",)
     search_fields = ("name",)
-    list_filter = ("author__username", "name", 'tags__name')
-    empty_value_display = "-пусто-"
+    list_filter = (("author", AutocompleteFilter), "tags")
+    autocomplete_fields = ("author",)
+    readonly_fields = ("favorites_count", "in_carts_count")
     inlines = (RecipeIngredientInline,)
 
     def favorites_count_display(self, obj):
-        favorites_count = Favorite.objects.filter(recipe=obj).count()
-        return favorites_count
+        return obj.favorites_count
 
     favorites_count_display.short_description = "В избранном"
+    favorites_count_display.admin_order_field = "favorites_count"
 
 
-class RecipeIngredientAdmin(admin.ModelAdmin):
+class RecipeIngredientAdmin(ScalableModelAdmin):
     list_display = ("id", "recipe", "ingredient", "amount")
-    empty_value_display = "-пусто-"
+    list_select_related = ("recipe", "ingredient")
+    list_filter = (("recipe", AutocompleteFilter),
+                   ("ingredient", AutocompleteFilter))
+    autocomplete_fields = ("recipe", "ingredient")
 
 
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(ScalableModelAdmin):
     list_display = ("id", "user", "recipe")
+    list_select_related = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
-    empty_value_display = "-пусто-"
+    list_filter = (("user", AutocompleteFilter),
+                   ("recipe", AutocompleteFilter))
+    autocomplete_fields = ("user", "recipe")
 
 
-class ShoppingListAdmin(admin.ModelAdmin):
+class ShoppingListAdmin(ScalableModelAdmin):
     list_display = ("id", "user", "recipe")
+    list_select_related = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
-    empty_value_display = "-пусто-"
+    list_filter = (("user", AutocompleteFilter),
+                   ("recipe", AutocompleteFilter))
+    autocomplete_fields = ("user", "recipe")
 
 
 admin.site.register(Tag, TagAdmin)
@@ -0,0 +1,60 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Subscription, User
+from .models import Favorite, Recipe, ShoppingList
+
+# Счётчик: (модель строк, поле внешнего ключа на запись со счётчиком).
+COUNTERS = {
+    Recipe: {
+        "favorites_count": (Favorite, "recipe"),
+        "in_carts_count": (ShoppingList, "recipe"),
+    },
+    User: {
+        "recipes_count": (Recipe, "author"),
+        "followers_count": (Subscription, "author"),
+    },
+}
+
+
+def change(model, pk, field, delta):
+    """Атомарно меняет счётчик записи; вызывается в транзакции записи,
+    изменившей подсчитываемые строки."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)})
+
+
+def counted(model, field):
+    """Подзапрос с числом строк model, ссылающихся на текущую запись."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef("pk")}).order_by()
+        .values(field).annotate(count=Count("pk")).values("count")
+    ), 0)
+
+
+def drifted_ids(model, ids=None):
+    """id записей, счётчики которых разошлись с подсчётом."""
+    queryset = model.objects.all()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    counters = COUNTERS[model]
+    queryset = queryset.annotate(**{
+        f"actual_{name}": counted(*source)
+        for name, source in counters.items()
+    })
+    drift = Q()
+    for name in counters:
+        drift |= ~Q(**{name: F(f"actual_{name}")})
+    return list(queryset.filter(drift).order_by("pk").values_list(
+        "pk", flat=True))
+
+
+def reconcile(model, ids=None):
+    """Пересчитывает счётчики записей (всех, если ids=None)."""
+    queryset = model.objects.all()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.update(**{
+        name: counted(*source)
+        for name, source in COUNTERS[model].items()
+    })
@@ -1,30 +1,106 @@
 import csv
+import itertools
+import json
+import time
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from api.cache import bump_reference_version
+from api.checks import cache_is_shared
 from recipes.models import Ingredient
 
+DEFAULT_PATH = "foodgram/data/ingredients.csv"
+READ_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for row in csv.DictReader(file):
+        yield row["name"], row["measurement_unit"]
+
+
+def read_json(file):
+    """Элементы JSON-массива по одному, без чтения файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Ожидается JSON-массив ингредиентов.")
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            row, end = decoder.raw_decode(buffer)
+        except ValueError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield row["name"], row["measurement_unit"]
+        buffer = buffer[end:]
+
+
+READERS = {".csv": read_csv, ".json": read_json}
+
 
 class Command(BaseCommand):
+    help = (
+        "Загружает справочник ингредиентов из CSV или JSON. Повторный "
+        "запуск добавляет только новые пары (название, единица измерения)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
     def handle(self, *args, **options):
-        if Ingredient.objects.exists():
-            print("Данные уже загружены...выход!")
-            return
-        print("Загрузка Ingredients данных")
+        path = Path(options["path"])
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError("Поддерживаются только файлы .csv и .json.")
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден.")
 
-        try:
-            file_path = "foodgram/data/ingredients.csv"
-            print(file_path)
-            with open(file_path) as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    db = Ingredient(
-                        name=row["name"],
-                        measurement_unit=row["measurement_unit"]
-                    )
-                    db.save()
-                print("Ingredients импортированы.")
-        except FileNotFoundError:
-            print("CSV file не найден.")
-        except Exception as e:
-            print(f"Произошла ошибка: {str(e)}")
+        started = time.perf_counter()
+        with path.open(encoding="utf-8") as file, transaction.atomic():
+            seen = set(Ingredient.objects.values_list(
+                "name", "measurement_unit"))
+            existing = len(seen)
+            total = 0
+
+            def new_rows():
+                nonlocal total
+                for name, unit in reader(file):
+                    total += 1
+                    key = (name.strip(), unit.strip())
+                    if key[0] and key not in seen:
+                        seen.add(key)
+                        yield Ingredient(name=key[0], measurement_unit=key[1])
+
+            rows = new_rows()
+            created = 0
+            while True:
+                chunk = list(itertools.islice(rows, options["chunk_size"]))
+                if not chunk:
+                    break
+                Ingredient.objects.bulk_create(chunk)
+                created += len(chunk)
+            if created:
+                # bulk_create не отправляет сигналы, версию справочника
+                # для кэша и поиска нужно сменить явно.
+                transaction.on_commit(
+                    lambda: bump_reference_version(Ingredient))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Прочитано строк: {total}, добавлено: {created}, "
+            f"уже было: {existing}, "
+            f"за {time.perf_counter() - started:.2f} c."))
+        if created and not cache_is_shared():
+            self.stdout.write(self.style.WARNING(
+                "Кэш не общий для процессов: запущенные воркеры увидят "
+                "новые ингредиенты не позже чем через "
+                f"{settings.CACHE_VERSION_TIMEOUT} c."))
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingList, ShoppingListTotal
+from recipes.totals import expected_totals, rebuild_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет итоги списков покупок с самими списками и пересчитывает "
+        "итоги пользователей, у которых они разошлись."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Только сообщить о расхождениях, ничего не меняя.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user_ids = sorted(
+            set(ShoppingList.objects.values_list("user_id", flat=True))
+            | set(ShoppingListTotal.objects.values_list(
+                "user_id", flat=True))
+        )
+        chunk_size = options["chunk_size"]
+        drifted = []
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            expected = defaultdict(dict)
+            for user_id, ingredient_id, total in expected_totals(chunk):
+                expected[user_id][ingredient_id] = total
+            actual = defaultdict(dict)
+            for user_id, ingredient_id, amount in (
+                ShoppingListTotal.objects.filter(
+                    user_id__in=chunk, amount__gt=0
+                ).values_list("user_id", "ingredient_id", "amount")
+            ):
+                actual[user_id][ingredient_id] = amount
+            chunk_drifted = [
+                user_id for user_id in chunk
+                if expected[user_id] != actual[user_id]
+            ]
+            if chunk_drifted and not options["verify"]:
+                with transaction.atomic():
+                    rebuild_totals(chunk_drifted)
+            drifted.extend(chunk_drifted)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(
+                f"Расхождений нет, проверено пользователей: {len(user_ids)}."))
+        elif options["verify"]:
+            self.stdout.write(self.style.WARNING(
+                f"Итоги разошлись у пользователей: {len(drifted)}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Итоги пересчитаны у пользователей: {len(drifted)}."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет счётчики рецептов (избранное, списки покупок) и "
+        "пользователей (рецепты, подписчики) с подсчётом строк и "
+        "пересчитывает разошедшиеся."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Только сообщить о расхождениях, ничего не меняя.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        for model in counters.COUNTERS:
+            ids = list(model.objects.order_by("pk").values_list(
+                "pk", flat=True))
+            drifted = []
+            for start in range(0, len(ids), chunk_size):
+                chunk_drifted = counters.drifted_ids(
+                    model, ids[start:start + chunk_size])
+                if chunk_drifted and not options["verify"]:
+                    with transaction.atomic():
+                        counters.reconcile(model, chunk_drifted)
+                drifted.extend(chunk_drifted)
+
+            name = model._meta.verbose_name_plural
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: расхождений нет, проверено {len(ids)}."))
+            elif options["verify"]:
+                self.stdout.write(self.style.WARNING(
+                    f"{name}: счётчики разошлись у {len(drifted)}."))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: счётчики пересчитаны у {len(drifted)}."))
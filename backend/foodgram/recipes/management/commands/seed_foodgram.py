@@ -0,0 +1,231 @@
+import itertools
+import random
+import time
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from recipes import counters
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingList, Tag)
+from recipes.totals import rebuild_totals
+from users.models import Subscription, User
+
+SEED_IMAGE = "recipes/seed.png"
+SEED_PASSWORD = "Foodgram-seed-1"
+DEFAULT_TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+)
+
+
+def zipf_weights(size, exponent):
+    """Кумулятивные веса степенного распределения для random.choices."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетических пользователей, рецепты, избранное, "
+        "списки покупок и подписки для нагрузочного профилирования."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument(
+            "--favorites", type=int, default=20,
+            help="Среднее число рецептов в избранном у пользователя.")
+        parser.add_argument(
+            "--carts", type=int, default=5,
+            help="Среднее число рецептов в списке покупок у пользователя.")
+        parser.add_argument(
+            "--subscriptions", type=int, default=10,
+            help="Среднее число подписок у пользователя.")
+        parser.add_argument(
+            "--exponent", type=float, default=1.1,
+            help="Показатель степенного распределения популярности.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.exponent = options["exponent"]
+        ingredient_ids = list(
+            Ingredient.objects.order_by("id").values_list("id", flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                "Ингредиенты не загружены, выполните load_ingr.")
+        self.random.shuffle(ingredient_ids)
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            tag_ids = self.ensure_tags()
+            self.ensure_image()
+            user_ids = self.create_users(options["users"])
+            recipe_ids = self.create_recipes(options["recipes"], user_ids)
+            self.create_recipe_ingredients(recipe_ids, ingredient_ids)
+            self.create_recipe_tags(recipe_ids, tag_ids)
+            self.create_links(
+                Favorite, "recipe_id", user_ids, recipe_ids,
+                options["favorites"])
+            self.create_links(
+                ShoppingList, "recipe_id", user_ids, recipe_ids,
+                options["carts"])
+            self.create_links(
+                Subscription, "author_id", user_ids, user_ids,
+                options["subscriptions"], exclude_self=True)
+            self.reset_sequences()
+            rebuild_totals(user_ids)
+            counters.reconcile(Recipe, recipe_ids)
+            counters.reconcile(User, user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Данные сгенерированы за {time.perf_counter() - started:.1f} c."))
+
+    def bulk_create(self, model, objs):
+        """Сохраняет объекты порциями по chunk_size и возвращает их число."""
+        started = time.perf_counter()
+        total = 0
+        objs = iter(objs)
+        while True:
+            chunk = list(itertools.islice(objs, self.chunk_size))
+            if not chunk:
+                break
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            total += len(chunk)
+        self.stdout.write(
+            f"{model._meta.db_table}: {total} строк "
+            f"за {time.perf_counter() - started:.1f} c.")
+        return total
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+    def ensure_tags(self):
+        if not Tag.objects.exists():
+            for name, color, slug in DEFAULT_TAGS:
+                Tag.objects.create(name=name, color=color, slug=slug)
+        return list(Tag.objects.order_by("id").values_list("id", flat=True))
+
+    def ensure_image(self):
+        if default_storage.exists(SEED_IMAGE):
+            return
+        buffer = BytesIO()
+        Image.new("RGB", (64, 64), "#E26C2D").save(buffer, "PNG")
+        default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count):
+        first_id = self.next_id(User)
+        password = make_password(SEED_PASSWORD)
+        user_ids = list(range(first_id, first_id + count))
+        self.bulk_create(User, (
+            User(
+                id=user_id,
+                username=f"seed{user_id}",
+                email=f"seed{user_id}@foodgram.ru",
+                first_name=f"Имя{user_id}",
+                last_name=f"Фамилия{user_id}",
+                password=password,
+            )
+            for user_id in user_ids
+        ))
+        return user_ids
+
+    def create_recipes(self, count, user_ids):
+        first_id = self.next_id(Recipe)
+        recipe_ids = list(range(first_id, first_id + count))
+        authors = self.random.choices(
+            user_ids,
+            cum_weights=zipf_weights(len(user_ids), self.exponent),
+            k=count,
+        )
+        self.bulk_create(Recipe, (
+            Recipe(
+                id=recipe_id,
+                author_id=author_id,
+                name=f"Рецепт {recipe_id}",
+                image=SEED_IMAGE,
+                text=f"Описание приготовления рецепта {recipe_id}.",
+                cooking_time=self.random.randint(5, 180),
+            )
+            for recipe_id, author_id in zip(recipe_ids, authors)
+        ))
+        return recipe_ids
+
+    def create_recipe_ingredients(self, recipe_ids, ingredient_ids):
+        weights = zipf_weights(len(ingredient_ids), self.exponent)
+        sample_size = min(12, len(ingredient_ids))
+
+        def rows():
+            for recipe_id in recipe_ids:
+                picked = set(self.random.choices(
+                    ingredient_ids, cum_weights=weights,
+                    k=self.random.randint(min(3, sample_size), sample_size),
+                ))
+                for ingredient_id in picked:
+                    yield RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.random.randint(1, 500),
+                    )
+
+        self.bulk_create(RecipeIngredient, rows())
+
+    def create_recipe_tags(self, recipe_ids, tag_ids):
+        through = Recipe.tags.through
+
+        def rows():
+            for recipe_id in recipe_ids:
+                for tag_id in self.random.sample(
+                        tag_ids, self.random.randint(1, len(tag_ids))):
+                    yield through(recipe_id=recipe_id, tag_id=tag_id)
+
+        self.bulk_create(through, rows())
+
+    def create_links(self, model, target_field, user_ids, target_ids,
+                     average, exclude_self=False):
+        """Связи пользователей с объектами по степенному закону.
+
+        Число связей у пользователя и популярность цели распределены
+        по Парето, поэтому небольшая доля рецептов и авторов получает
+        большую часть избранного, списков покупок и подписок.
+        """
+        if not target_ids or average <= 0:
+            return
+        weights = zipf_weights(len(target_ids), self.exponent)
+        targets = target_ids[:]
+        self.random.shuffle(targets)
+        alpha = 2.0
+        scale = average * (alpha - 1) / alpha
+
+        def rows():
+            for user_id in user_ids:
+                size = min(
+                    int(scale * self.random.paretovariate(alpha)),
+                    len(targets),
+                )
+                picked = set(self.random.choices(
+                    targets, cum_weights=weights, k=size))
+                if exclude_self:
+                    picked.discard(user_id)
+                for target_id in picked:
+                    yield model(user_id=user_id, **{target_field: target_id})
+
+        self.bulk_create(model, rows())
+
+    def reset_sequences(self):
+        models = (User, Recipe)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+CREATE_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS recipes_ingredient_name_prefix_idx "
+    "ON recipes_ingredient (lower(name) varchar_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS recipes_ingredient_name_trgm_idx "
+    "ON recipes_ingredient USING gin (lower(name) gin_trgm_ops)",
+)
+DROP_INDEXES = (
+    "DROP INDEX IF EXISTS recipes_ingredient_name_trgm_idx",
+    "DROP INDEX IF EXISTS recipes_ingredient_name_prefix_idx",
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEXES),
+            run_on_postgresql(DROP_INDEXES),
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
 
-from users.models import User
+from users.models import CounterFieldsMixin, User
+from .storage import ContentAddressedStorage
 
 MIN_AMOUNT = 1
 MAX_AMOUNT = 32000
@@ -60,7 +61,7 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -73,8 +74,16 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to="recipes/",
+        storage=ContentAddressedStorage(),
+        db_index=True,
         verbose_name="Картинка",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Уменьшенные копии картинки",
+    )
     text = models.TextField(
         verbose_name="Описание приготовления",
     )
@@ -101,8 +110,24 @@ class Recipe(models.Model):
         verbose_name="Дата публикации",
         db_index=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="В избранном",
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="В списках покупок",
+    )
+
+    counter_fields = ("favorites_count", "in_carts_count")
 
     class Meta(CustomMeta):
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"],
+                         name="recipe_pub_date_id_idx"),
+            models.Index(fields=["-favorites_count", "-id"],
+                         name="recipe_popularity_idx"),
+        ]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
 
@@ -154,6 +179,10 @@ class Favorite(models.Model):
     )
 
     class Meta(CustomMeta):
+        indexes = [
+            models.Index(fields=["user", "recipe"],
+                         name="favorite_user_recipe_idx"),
+        ]
         verbose_name = "Список избранного"
         verbose_name_plural = "Список избранного"
 
@@ -176,8 +205,42 @@ class ShoppingList(models.Model):
     )
 
     class Meta(CustomMeta):
+        indexes = [
+            models.Index(fields=["user", "recipe"],
+                         name="shoppinglist_user_recipe_idx"),
+        ]
         verbose_name = "Список покупок"
         verbose_name_plural = "Список покупок"
 
     def __str__(self):
         return f"{self.user} : {self.recipe}"
+
+
+class ShoppingListTotal(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        related_name="shopping_list_totals",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name="Ингредиент",
+        related_name="shopping_list_totals",
+    )
+    amount = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество",
+    )
+
+    class Meta(CustomMeta):
+        constraints = [
+            models.UniqueConstraint(fields=["user", "ingredient"],
+                                    name="unique_shopping_list_total")
+        ]
+        verbose_name = "Итог списка покупок"
+        verbose_name_plural = "Итоги списков покупок"
+
+    def __str__(self):
+        return f"{self.user} : {self.ingredient} - {self.amount}"
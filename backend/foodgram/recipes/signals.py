@@ -0,0 +1,86 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, totals
+from .models import RecipeIngredient, ShoppingList
+
+# Итоги списков покупок меняются при каждой записи строк списка и строк
+# рецепта, в том числе из админки и при каскадном удалении рецепта,
+# пользователя или ингредиента. Обработчики post_delete смотрят на уже
+# удалённые строки, поэтому при каскаде итоги сходятся при любом порядке
+# удаления: строки рецепта, удалённые первыми, вычитаются из списков,
+# а строка списка, удалённая после них, вычитает уже пустой рецепт.
+# bulk_create и bulk_update сигналов не отправляют, их вызывающий код
+# меняет итоги сам.
+
+
+@receiver(post_save, sender=ShoppingList)
+def add_to_totals(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        totals.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingList)
+def remove_from_totals(sender, instance, **kwargs):
+    totals.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(sender, instance, raw, **kwargs):
+    """Запоминает строку рецепта до правки, например в админке."""
+    instance.saved_row = None
+    if not raw and not instance._state.adding:
+        instance.saved_row = RecipeIngredient.objects.filter(
+            pk=instance.pk).values_list(
+            "recipe_id", "ingredient_id", "amount").first()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def change_totals_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    saved_row = getattr(instance, "saved_row", None)
+    new = {instance.ingredient_id: instance.amount}
+    if saved_row is None:
+        totals.change_recipe(instance.recipe_id, {}, new)
+        return
+    recipe_id, ingredient_id, amount = saved_row
+    if recipe_id == instance.recipe_id:
+        totals.change_recipe(recipe_id, {ingredient_id: amount}, new)
+    else:
+        totals.change_recipe(recipe_id, {ingredient_id: amount}, {})
+        totals.change_recipe(instance.recipe_id, {}, new)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def change_totals_on_delete(sender, instance, **kwargs):
+    totals.change_recipe(
+        instance.recipe_id, {instance.ingredient_id: instance.amount}, {})
+
+
+def change_counters(instance, delta):
+    """Меняет счётчики записей, на которые ссылается строка instance."""
+    for model, fields in counters.COUNTERS.items():
+        for name, (source, field) in fields.items():
+            if isinstance(instance, source):
+                counters.change(
+                    model, getattr(instance, f"{field}_id"), name, delta)
+
+
+def count_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_counters(instance, 1)
+
+
+def count_deleted(sender, instance, **kwargs):
+    change_counters(instance, -1)
+
+
+# Счётчики, как и итоги, меняются сигналами, чтобы их не расстраивали
+# админка и каскадное удаление; массовые вставки пересчитывают их сами.
+for source in {
+    source for fields in counters.COUNTERS.values()
+    for source, _ in fields.values()
+}:
+    post_save.connect(count_created, sender=source)
+    post_delete.connect(count_deleted, sender=source)
@@ -0,0 +1,63 @@
+import os
+import posixpath
+from hashlib import sha256
+from uuid import uuid4
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы именуются SHA-256 содержимого: recipes/<хэш>.<расширение>.
+
+    Одинаковые картинки записываются на диск один раз, повторное
+    сохранение возвращает имя уже существующего файла и обновляет время
+    его изменения. Файлы без ссылок удаляет dedupe_media --delete-orphans,
+    только если они не сохранялись дольше RECIPE_IMAGE_ORPHAN_AGE: так
+    не удаляется файл, на который вот-вот сошлётся другой запрос.
+
+    Новый файл сначала пишется под временным именем и получает имя
+    по хэшу жёсткой ссылкой: если ту же картинку одновременно сохранил
+    другой запрос, остаётся его файл и возвращается то же имя.
+    """
+
+    def hashed_name(self, name, content):
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Занятое имя — это файл с тем же содержимым, другое имя не нужно.
+        validate_file_name(name, allow_relative_path=True)
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        temporary = super()._save(
+            posixpath.join(directory, f".{uuid4().hex}.{filename}.part"),
+            content)
+        try:
+            os.link(self.path(temporary), self.path(name))
+        except FileExistsError:
+            os.utime(self.path(name))
+        finally:
+            os.remove(self.path(temporary))
+        return name
@@ -0,0 +1,103 @@
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .models import RecipeIngredient, ShoppingList, ShoppingListTotal
+
+
+def recipe_amounts(recipe_id):
+    """Количества ингредиентов рецепта: {ingredient_id: amount}."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .values("ingredient_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+        .values_list("ingredient_id", "total")
+    )
+
+
+def expected_totals(user_ids=None):
+    """Итоги, вычисленные заново из списков покупок одним запросом."""
+    # Условия на список покупок задаются в одном filter(): каждый
+    # следующий filter() по многозначной связи добавляет свой JOIN,
+    # и суммы умножаются на число списков с рецептом.
+    conditions = {"recipe__shopping_lists__isnull": False}
+    if user_ids is not None:
+        conditions["recipe__shopping_lists__user__in"] = user_ids
+    queryset = RecipeIngredient.objects.filter(**conditions)
+    return queryset.values(
+        "recipe__shopping_lists__user", "ingredient"
+    ).annotate(total=Sum("amount")).order_by().values_list(
+        "recipe__shopping_lists__user", "ingredient", "total")
+
+
+def rebuild_totals(user_ids=None):
+    """Пересчитывает итоги пользователей (всех, если user_ids=None)."""
+    totals = ShoppingListTotal.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+    totals.delete()
+    ShoppingListTotal.objects.bulk_create(
+        (
+            ShoppingListTotal(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total)
+            for user_id, ingredient_id, total
+            in expected_totals(user_ids).iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+def change_totals(user_ids, deltas):
+    """Прибавляет deltas {ingredient_id: amount} к итогам пользователей.
+
+    Все изменения — атомарные UPDATE с F(), поэтому параллельные
+    запросы не теряют слагаемых. user_ids — список или подзапрос.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    added = [pk for pk, delta in deltas.items() if delta > 0]
+    if added:
+        ShoppingListTotal.objects.bulk_create(
+            (
+                ShoppingListTotal(user_id=user_id, ingredient_id=pk)
+                for user_id in list(user_ids)
+                for pk in added
+            ),
+            ignore_conflicts=True,
+        )
+    totals = ShoppingListTotal.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas)
+    totals.update(amount=Greatest(
+        F("amount") + Case(
+            *(When(ingredient_id=pk, then=Value(delta))
+              for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        0,
+    ))
+    if len(added) < len(deltas):
+        totals.filter(amount=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    change_totals([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    change_totals([user_id], {
+        pk: -amount for pk, amount in recipe_amounts(recipe_id).items()})
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Переносит в итоги правку ингредиентов рецепта из списков покупок."""
+    deltas = {
+        pk: new_amounts.get(pk, 0) - old_amounts.get(pk, 0)
+        for pk in old_amounts.keys() | new_amounts.keys()
+    }
+    change_totals(
+        ShoppingList.objects.filter(
+            recipe_id=recipe_id).values_list("user_id", flat=True),
+        deltas,
+    )
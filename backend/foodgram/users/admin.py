@@ -1,30 +1,35 @@
 from django.contrib import admin
 
+from core.admin_utils import AutocompleteFilter, ScalableModelAdmin
 from .models import Subscription, User
 
 
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScalableModelAdmin):
     list_display = (
         "id",
         "username",
         "email",
         "first_name",
         "last_name",
+        "recipes_count",
+        "followers_count",
     )
-    search_fields = ("username",)
-    list_filter = ("email", "first_name",)
-    empty_value_display = "-пусто-"
+    search_fields = ("username", "email", "first_name")
+    list_filter = ("is_active", "is_staff")
+    readonly_fields = ("recipes_count", "followers_count")
 
 
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ScalableModelAdmin):
     list_display = (
         "id",
         "user",
         "author",
     )
-    search_fields = ("user", "author")
-    list_filter = ("user", "author")
-    empty_value_display = "-пусто-"
+    list_select_related = ("user", "author")
+    search_fields = ("user__username", "author__username")
+    list_filter = (("user", AutocompleteFilter),
+                   ("author", AutocompleteFilter))
+    autocomplete_fields = ("user", "author")
 
 
 admin.site.register(User, UserAdmin)
@@ -9,7 +9,31 @@ class CustomUserMeta:
     ordering = ("-id",)
 
 
-class User(AbstractUser):
+class CounterFieldsMixin:
+    """Модель с денормализованными счётчиками.
+
+    Счётчики меняются только выражениями F() в UPDATE, поэтому save()
+    уже сохранённой записи их не перезаписывает: иначе прочитанное
+    раньше значение затёрло бы параллельные изменения.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get("using") in (None, self._state.db)
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CounterFieldsMixin, AbstractUser):
     username = models.CharField(
         max_length=150,
         verbose_name="Логин",
@@ -50,6 +74,16 @@ class User(AbstractUser):
         max_length=150,
         verbose_name="Фамилия",
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Рецептов",
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Подписчиков",
+    )
+
+    counter_fields = ("recipes_count", "followers_count")
 
     class Meta(CustomUserMeta):
         verbose_name = "Пользователь"